@@ -1,6 +1,6 @@
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from app.schemas.token import Token_Data
+from app.schemas.token import Token_Data, Current_User
 from fastapi import Depends, status, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -9,11 +9,15 @@ from app.database.models.user import User
 import os
 from app.config.config import settings
 from sqlalchemy.future import select
+from app.auth.principal_cache import principal_cache
 
 
 # initiate the oauth2 scheme using the password bearer to correspond to url with 'login'
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+# same scheme for endpoints that also serve anonymous clients (no token gives None instead of 401)
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login", auto_error=False)
+
 # secret key
 SECRET_KEY = settings.secret_key
 
@@ -44,7 +48,7 @@ def verify_access_token(token: str, credentials_exception):
         id: str = payload.get("user_id")
         if id is None:
             raise credentials_exception
-        token_data = Token_Data(id=id)
+        token_data = Token_Data(id=id, exp=payload.get("exp"))
     except JWTError:
         raise credentials_exception
     return token_data
@@ -53,12 +57,45 @@ def verify_access_token(token: str, credentials_exception):
 async def get_current_user(
     token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
 ):
+    return await _resolve_principal(token, db)
+
+
+# the user behind the token if there is one, anonymous requests get None
+# an expired, stale or malformed token is treated as anonymous too: these endpoints are public,
+# and clients holding on to an old token must still be able to browse
+async def get_optional_current_user(
+    token: str | None = Depends(optional_oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+):
+    if token is None:
+        return None
+    try:
+        return await _resolve_principal(token, db)
+    except HTTPException:
+        return None
+
+
+async def _resolve_principal(token: str, db: AsyncSession) -> Current_User:
     credentials_exception = HTTPException(
         status_code=404,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    token = verify_access_token(token, credentials_exception=credentials_exception)
-    query = await db.execute(select(User).where(User.id == token.id))
-    user = query.scalars().first()
-    return user
+    # steady state: the token was already verified and its user looked up
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
+    token_data = verify_access_token(
+        token, credentials_exception=credentials_exception
+    )
+    version = principal_cache.user_version(token_data.id)
+    query = await db.execute(
+        select(User.id, User.email).where(User.id == token_data.id)
+    )
+    user = query.first()
+    if user is None:
+        raise credentials_exception
+    principal = Current_User(id=user.id, email=user.email)
+    principal_cache.set(token, principal, version, token_data.exp)
+    return principal
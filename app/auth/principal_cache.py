@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from sqlalchemy import event
+from app.database.models.user import User
+from app.schemas.token import Current_User
+from app.config.config import settings
+import time
+
+
+class PrincipalCache:
+    """
+    LRU cache of authenticated principals keyed by access token.
+
+    A cached token skips both the signature verification and the user lookup. Entries live at most
+    `ttl_seconds` and never past the token's own `exp`. Every entry remembers the version of its user
+    when it was loaded, `revoke_user` bumps that version so all tokens of a deleted user stop working
+    immediately in this worker.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, int, Current_User]] = OrderedDict()
+        self._user_versions: dict[int, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.revocations = 0
+
+    def user_version(self, user_id: int) -> int:
+        return self._user_versions.get(user_id, 0)
+
+    def get(self, token: str):
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, version, principal = entry
+        if expires_at <= time.time() or version != self.user_version(principal.id):
+            del self._entries[token]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return principal
+
+    def set(self, token: str, principal: Current_User, version: int, exp) -> None:
+        """
+        Cache a principal loaded while its user was at `version`.
+        `exp` is the expiration timestamp of the token, if it has one.
+        """
+        if version != self.user_version(principal.id):
+            # the user was revoked while it was being loaded
+            return
+        expires_at = time.time() + self.ttl_seconds
+        if exp is not None:
+            expires_at = min(expires_at, exp)
+        self._entries[token] = (expires_at, version, principal)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def revoke_user(self, user_id: int) -> None:
+        self._user_versions[user_id] = self.user_version(user_id) + 1
+        self.revocations += 1
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "revocations": self.revocations,
+        }
+
+
+principal_cache = PrincipalCache(
+    max_entries=settings.principal_cache_max_entries,
+    ttl_seconds=settings.principal_cache_ttl_seconds,
+)
+
+
+# deleting a user through the ORM invalidates every cached token of that user
+@event.listens_for(User, "after_delete")
+def revoke_deleted_user(mapper, connection, target):
+    principal_cache.revoke_user(target.id)
@@ -0,0 +1,90 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import time
+
+"""
+Storage backends for the read-through caches.
+The interface is async so a shared cache (e.g. Redis or memcached) can be slotted in for
+multi-worker deployments without touching the callers.
+"""
+
+
+class CacheBackend(ABC):
+    """
+    Interface every cache backend implements.
+    Values are JSON compatible payloads and must be treated as read-only by callers.
+    """
+
+    @abstractmethod
+    async def get(self, key: str):
+        """Return the cached value for the key, or None when it is missing or expired."""
+
+    @abstractmethod
+    async def set(self, key: str, value) -> None:
+        """Store a value under the key."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Remove the key if it is cached."""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Remove every key."""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Return the hit, miss and eviction counters of the backend."""
+
+
+class InMemoryLRUBackend(CacheBackend):
+    """
+    Size-bounded LRU cache with a per-entry TTL, local to the worker process.
+    Only touched from the event loop thread, so no locking is needed.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    async def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    async def set(self, key: str, value) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
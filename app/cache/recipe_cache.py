@@ -0,0 +1,90 @@
+from app.cache.backends import CacheBackend, InMemoryLRUBackend
+from app.config.config import settings
+from collections import OrderedDict
+import time
+
+# how long invalidations are remembered for `settle_seconds`
+INVALIDATION_MEMORY_SECONDS = 60.0
+
+
+class RecipeCache:
+    """
+    Read-through cache of serialized `Recipe_Out` payloads for the recipe detail endpoint.
+
+    Every write to a recipe must call `invalidate` after its commit.
+    A load that overlaps with an invalidation is returned but not stored, so a reader that fetched
+    the row just before a write can never put the old version back into the cache.
+    """
+
+    def __init__(self, backend: CacheBackend | None):
+        self.backend = backend
+        self.invalidations = 0
+        # recipe id -> monotonic time of its last invalidation, oldest first
+        self._recent_invalidations: OrderedDict[int, float] = OrderedDict()
+
+    @staticmethod
+    def _key(id: int) -> str:
+        return f"recipe:{id}"
+
+    async def get(self, id: int):
+        """
+        Return the cached payload of the recipe without loading it, or None.
+        """
+        if self.backend is None:
+            return None
+        return await self.backend.get(self._key(id))
+
+    async def get_or_load(self, id: int, loader, settle_seconds: float = 0.0):
+        """
+        Return the cached payload of the recipe, or await `loader()` and cache its result.
+        A `None` result (recipe not found) is never cached, nor is a load of a recipe invalidated
+        less than `settle_seconds` ago (loads from a replica that may not have the write yet).
+        """
+        if self.backend is None:
+            return await loader()
+        key = self._key(id)
+        payload = await self.backend.get(key)
+        if payload is not None:
+            return payload
+        invalidations = self.invalidations
+        payload = await loader()
+        if (
+            payload is not None
+            and invalidations == self.invalidations
+            and not self._invalidated_within(id, settle_seconds)
+        ):
+            await self.backend.set(key, payload)
+        return payload
+
+    def _invalidated_within(self, id: int, seconds: float) -> bool:
+        invalidated = self._recent_invalidations.get(id)
+        return invalidated is not None and time.monotonic() - invalidated < seconds
+
+    async def invalidate(self, id: int) -> None:
+        self.invalidations += 1
+        now = time.monotonic()
+        self._recent_invalidations.pop(id, None)
+        self._recent_invalidations[id] = now
+        while (
+            now - next(iter(self._recent_invalidations.values()))
+            > INVALIDATION_MEMORY_SECONDS
+        ):
+            self._recent_invalidations.popitem(last=False)
+        if self.backend is not None:
+            await self.backend.delete(self._key(id))
+
+    def stats(self) -> dict:
+        if self.backend is None:
+            return {}
+        return {**self.backend.stats(), "invalidations": self.invalidations}
+
+
+# the backend can be swapped for a shared one in multi-worker deployments
+recipe_cache = RecipeCache(
+    InMemoryLRUBackend(
+        max_entries=settings.recipe_cache_max_entries,
+        ttl_seconds=settings.recipe_cache_ttl_seconds,
+    )
+    if settings.recipe_cache_enabled
+    else None
+)
@@ -0,0 +1,86 @@
+from app.config.config import settings
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent reads: the first caller of a key (the leader) runs the function,
+    callers arriving while it runs (followers) await the leader's result instead of running their own.
+
+    Nothing is kept once the flight lands, the result only ever reaches callers that were already
+    waiting for it. If the leader is cancelled (e.g. its client went away) every follower runs the
+    function itself, errors of the leader are raised in its followers too.
+    At most `max_keys` flights are tracked, further keys simply run uncoalesced.
+    """
+
+    def __init__(self, enabled: bool, max_keys: int):
+        self.enabled = enabled
+        self.max_keys = max_keys
+        self._flights: dict = {}
+        self.leaders = 0
+        self.followers = 0
+        self.bypassed = 0
+        self.leader_cancellations = 0
+
+    async def do(self, key, function):
+        if not self.enabled:
+            return await function()
+
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.followers += 1
+            try:
+                # shielded, so a follower going away never cancels the leader's flight
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if not flight.cancelled():
+                    raise
+                # the leader was cancelled, not this follower
+            return await function()
+
+        if len(self._flights) >= self.max_keys:
+            self.bypassed += 1
+            return await function()
+
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        self.leaders += 1
+        try:
+            result = await function()
+        except asyncio.CancelledError:
+            self.leader_cancellations += 1
+            flight.cancel()
+            raise
+        except Exception as e:
+            flight.set_exception(e)
+            # retrieved here, so a flight without followers does not log "never retrieved"
+            flight.exception()
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def forget_all(self) -> None:
+        """
+        Make the next callers start new flights instead of joining the running ones.
+        Called after writes, so a read arriving after a commit never gets a result read before it.
+        """
+        self._flights.clear()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "bypassed": self.bypassed,
+            "leader_cancellations": self.leader_cancellations,
+        }
+
+
+single_flight = SingleFlight(
+    enabled=settings.single_flight_enabled,
+    max_keys=settings.single_flight_max_keys,
+)
@@ -0,0 +1,133 @@
+from datetime import datetime
+from sqlalchemy import select
+from app.database.database import AsyncSessionLocal, engine
+from app.database.models.recipe import Recipe
+from app.media.derivatives import variant_urls
+from app.config.config import settings
+import argparse
+import asyncio
+import orjson
+import sys
+import zlib
+
+"""
+Streaming export of the recipe catalog as NDJSON (one `Recipe_Out` JSON object per line).
+
+Rows are read in id order through a server-side cursor, `batch_size` at a time, and every batch is
+encoded and handed on before the next one is fetched, so memory stays flat however big the catalog.
+Since the export is ordered by id, a broken transfer resumes with `after_id` set to the id of the
+last complete line.
+
+Usage:
+    python -m app.catalog.export [--owner-id N] [--created-after ISO] [--after-id N]
+                                 [--batch-size N] [--gzip] [--output FILE]
+"""
+
+EXPORT_COLUMNS = [
+    Recipe.id,
+    Recipe.title,
+    Recipe.ingredients,
+    Recipe.image_path,
+    Recipe.likes,
+    Recipe.created_at,
+    Recipe.description,
+    Recipe.owner_id,
+    Recipe.version,
+    Recipe.updated_at,
+]
+
+
+def export_query(
+    owner_id: int | None = None,
+    created_after: datetime | None = None,
+    after_id: int | None = None,
+):
+    query = select(*EXPORT_COLUMNS).order_by(Recipe.id)
+    if owner_id is not None:
+        query = query.where(Recipe.owner_id == owner_id)
+    if created_after is not None:
+        query = query.where(Recipe.created_at > created_after)
+    if after_id is not None:
+        query = query.where(Recipe.id > after_id)
+    return query
+
+
+async def iter_ndjson(query, batch_size: int = settings.export_batch_size):
+    """
+    Yield the rows of `query` as NDJSON, one chunk of bytes per batch of rows.
+    The generator opens its own session, a streaming response outlives the request's session.
+    """
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(query.execution_options(yield_per=batch_size))
+        async for batch in result.mappings().partitions():
+            lines = []
+            for row in batch:
+                recipe = dict(row)
+                recipe["image_variants"] = variant_urls(recipe["image_path"])
+                lines.append(orjson.dumps(recipe))
+            yield b"\n".join(lines) + b"\n"
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """
+    Whether an Accept-Encoding header allows gzip, honouring q-values: `gzip;q=0` refuses it,
+    and `*` stands for gzip when gzip is not listed.
+    """
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, _, parameters = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for parameter in parameters.split(";"):
+            name, _, value = parameter.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+
+async def gzip_chunks(chunks):
+    """
+    Compress a stream of byte chunks into a single gzip stream, chunk by chunk.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+async def export(args) -> None:
+    query = export_query(args.owner_id, args.created_after, args.after_id)
+    chunks = iter_ndjson(query, args.batch_size)
+    if args.gzip:
+        chunks = gzip_chunks(chunks)
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        async for chunk in chunks:
+            output.write(chunk)
+    finally:
+        if args.output:
+            output.close()
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the recipe catalog as NDJSON")
+    parser.add_argument("--owner-id", type=int)
+    parser.add_argument("--created-after", type=datetime.fromisoformat)
+    parser.add_argument("--after-id", type=int, help="resume after this recipe id")
+    parser.add_argument("--batch-size", type=int, default=settings.export_batch_size)
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--output", help="file to write, stdout by default")
+    asyncio.run(export(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
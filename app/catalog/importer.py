@@ -0,0 +1,331 @@
+from asyncpg.exceptions import IntegrityConstraintViolationError
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, EmailStr, ValidationError, model_validator
+from sqlalchemy import insert, select, update, func, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.database.database import AsyncSessionLocal, engine
+from app.database.models.like import Like
+from app.database.models.recipe import Recipe
+from app.database.models.user import User
+from app.schemas.recipe_schemas import Recipe_Create
+from app.schemas.user_schemas import UserCreate
+from app.search import ingredient_index
+from app.utils import password_hash
+from app.utils.conditional import as_datetime
+from app.config.config import settings
+import argparse
+import asyncio
+import csv
+import gzip
+import io
+import orjson
+import os
+import re
+
+"""
+Bulk import of users, recipes and likes from NDJSON or CSV (optionally gzip compressed).
+
+Rows are read as a stream and validated with the API schemas. Every `batch_size` valid rows are
+written with multi-row inserts (or COPY on Postgres with `--copy`) and committed, so memory stays
+bounded by one batch and an interrupted import keeps what it committed. Rows that already exist are
+skipped on insert, so an import can simply be run again. Lines that are not valid JSON or fail
+validation are counted as invalid, and a batch the database rejects (e.g. a recipe whose owner does
+not exist) is written again row by row so only the offending rows are left out, as rejected.
+
+Rows may carry their old `id`, which keeps references between the files intact, the id sequences
+are moved past the imported ids afterwards. Import users first, then recipes, then likes.
+Importing likes recomputes `Recipe.likes` from the likes table in one statement.
+
+Users carry either a bcrypt `password_hash` from the old platform, or a plain `password` (checked
+against the registration rules and hashed on import, which is slow by design).
+
+Usage:
+    python -m app.catalog.importer {users,recipes,likes} FILE [--format ndjson|csv]
+                                   [--batch-size N] [--copy]
+"""
+
+BCRYPT_HASH = re.compile(r"^\$2[abxy]?\$\d{2}\$[./A-Za-z0-9]{53}$")
+
+# invalid rows reported in full, the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+
+class UserImport(BaseModel):
+    id: Optional[int] = None
+    email: EmailStr
+    password: Optional[str] = None
+    password_hash: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    @model_validator(mode="after")
+    def check_password(self):
+        if self.password_hash:
+            if not BCRYPT_HASH.match(self.password_hash):
+                raise ValueError("password_hash must be a bcrypt hash")
+        elif self.password:
+            # the same password rules as the registration
+            UserCreate(email=self.email, password=self.password)
+        else:
+            raise ValueError("Either password or password_hash is required")
+        return self
+
+
+class RecipeImport(Recipe_Create):
+    id: Optional[int] = None
+    owner_id: int
+    image_path: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+class LikeImport(BaseModel):
+    user_id: int
+    recipe_id: int
+    created_at: Optional[datetime] = None
+
+
+SCHEMAS = {"users": UserImport, "recipes": RecipeImport, "likes": LikeImport}
+
+
+def read_rows(path: str, format: str | None = None):
+    """
+    Yield `(line_number, row, error)` for every record of an NDJSON or CSV file, where `error`
+    describes a line that could not be decoded (and `row` is then None).
+    The format defaults to the file extension, `.gz` files are decompressed on the fly.
+    """
+    name = path.removesuffix(".gz")
+    format = format or ("csv" if name.endswith(".csv") else "ndjson")
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as file:
+        if format == "csv":
+            reader = csv.DictReader(io.TextIOWrapper(file, encoding="utf-8", newline=""))
+            for line_number, row in enumerate(reader, start=2):
+                # empty cells are missing values, not empty strings
+                yield line_number, {key: value or None for key, value in row.items()}, None
+        else:
+            for line_number, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, orjson.loads(line), None
+                except orjson.JSONDecodeError as e:
+                    yield line_number, None, f"Invalid JSON: {e}"
+
+
+def _database_row(record: BaseModel) -> dict:
+    row = record.model_dump(exclude_none=True)
+    if "created_at" in row:
+        row["created_at"] = as_datetime(row["created_at"])
+    return row
+
+
+class Importer:
+    def __init__(self, db, kind: str, use_copy: bool, hash_workers: int):
+        self.db = db
+        self.kind = kind
+        self.table = {"users": User, "recipes": Recipe, "likes": Like}[kind].__table__
+        self.dialect = db.bind.dialect.name
+        self.use_copy = use_copy and db.bind.dialect.driver == "asyncpg"
+        self.hash_workers = hash_workers
+        self.inserted = 0
+        self.rejected = 0
+
+    async def _hash_passwords(self, rows: list[dict]) -> None:
+        loop = asyncio.get_running_loop()
+        plain = [row for row in rows if "password_hash" not in row]
+        if plain:
+            # bcrypt releases the GIL, so the threads hash in parallel
+            with ThreadPoolExecutor(max_workers=self.hash_workers) as pool:
+                hashes = await asyncio.gather(
+                    *(
+                        loop.run_in_executor(pool, password_hash.hash, row["password"])
+                        for row in plain
+                    )
+                )
+            for row, hashed in zip(plain, hashes):
+                row["password_hash"] = hashed
+        for row in rows:
+            row["password"] = row.pop("password_hash")
+
+    async def _copy(self, columns: list[str], rows: list[dict]) -> int:
+        connection = await self.db.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            self.table.name,
+            columns=columns,
+            records=[tuple(row[column] for column in columns) for row in rows],
+        )
+        return len(rows)
+
+    async def _insert(self, rows: list[dict]) -> list:
+        if self.dialect == "postgresql":
+            statement = postgresql_insert(self.table).on_conflict_do_nothing()
+        elif self.dialect == "sqlite":
+            statement = sqlite_insert(self.table).on_conflict_do_nothing()
+        else:
+            statement = insert(self.table)
+        if self.kind == "recipes":
+            returning = [self.table.c.id, self.table.c.ingredients]
+        else:
+            returning = list(self.table.primary_key.columns)[:1]
+        result = await self.db.execute(statement.returning(*returning), rows)
+        # rows skipped as already imported are not returned
+        return result.all()
+
+    async def _write_rows(self, rows: list[dict], use_copy: bool) -> int:
+        """
+        Write rows in the current transaction and return how many were inserted.
+        """
+        inserted = 0
+        # a multi-row insert needs the same columns on every row (e.g. with and without ids)
+        shapes: dict[tuple, list[dict]] = {}
+        for row in rows:
+            shapes.setdefault(tuple(sorted(row)), []).append(row)
+
+        for columns, group in shapes.items():
+            # COPY can not return generated ids, which the ingredient index needs
+            if use_copy and (self.kind != "recipes" or "id" in columns):
+                inserted += await self._copy(list(columns), group)
+                indexed = [(row["id"], row["ingredients"]) for row in group]
+            else:
+                indexed = await self._insert(group)
+                inserted += len(indexed)
+            if self.kind == "recipes":
+                await ingredient_index.index_recipes(self.db, indexed)
+        return inserted
+
+    async def write(self, records: list[tuple[int, BaseModel]]) -> None:
+        """
+        Write and commit a batch of `(line_number, record)`. When the database rejects the batch,
+        its rows are written again one per transaction and the failing ones are reported.
+        """
+        rows = [_database_row(record) for _, record in records]
+        if self.kind == "users":
+            await self._hash_passwords(rows)
+        try:
+            inserted = await self._write_rows(rows, self.use_copy)
+            await self.db.commit()
+            self.inserted += inserted
+            return
+        except (IntegrityError, IntegrityConstraintViolationError):
+            await self.db.rollback()
+
+        # rows with their own id first, so that a generated id can not take one of theirs
+        retried = sorted(
+            zip((line_number for line_number, _ in records), rows),
+            key=lambda pair: "id" not in pair[1],
+        )
+        for line_number, row in retried:
+            try:
+                inserted = await self._write_rows([row], use_copy=False)
+                await self.db.commit()
+                self.inserted += inserted
+            except IntegrityError as e:
+                await self.db.rollback()
+                self.rejected += 1
+                if self.rejected <= MAX_REPORTED_ERRORS:
+                    print(f"Line {line_number}: rejected by the database: {e.orig}")
+
+    async def finish(self) -> None:
+        if self.kind == "likes":
+            await recompute_like_counts(self.db)
+        if self.kind in ("users", "recipes") and self.dialect == "postgresql":
+            # imported ids do not move the sequence, the next insert would collide with them
+            await self.db.execute(
+                text(
+                    f"SELECT setval(pg_get_serial_sequence('{self.table.name}', 'id'), "
+                    f"(SELECT coalesce(max(id), 0) + 1 FROM {self.table.name}), false)"
+                )
+            )
+        await self.db.commit()
+
+
+async def recompute_like_counts(db) -> None:
+    """
+    Set every `Recipe.likes` to the number of its `Like` rows in one set-based statement.
+    Only recipes whose count changes are written (and get a new version for their ETag).
+    """
+    counted = (
+        select(func.count())
+        .select_from(Like)
+        .where(Like.recipe_id == Recipe.id)
+        .scalar_subquery()
+    )
+    await db.execute(
+        update(Recipe)
+        .where(Recipe.likes != counted)
+        .values(likes=counted, version=Recipe.version + 1, updated_at=func.now())
+    )
+
+
+async def import_file(
+    kind: str,
+    path: str,
+    format: str | None = None,
+    batch_size: int = settings.import_batch_size,
+    use_copy: bool = False,
+    hash_workers: int = os.cpu_count() or 1,
+) -> dict:
+    schema = SCHEMAS[kind]
+    errors = 0
+    read = 0
+    async with AsyncSessionLocal() as db:
+        importer = Importer(db, kind, use_copy, hash_workers)
+        batch = []
+        for line_number, row, error in read_rows(path, format):
+            read += 1
+            if error is None:
+                try:
+                    batch.append((line_number, schema.model_validate(row)))
+                except ValidationError as e:
+                    error = e.errors()[0]["msg"]
+            if error is not None:
+                errors += 1
+                if errors <= MAX_REPORTED_ERRORS:
+                    print(f"Line {line_number}: {error}")
+                continue
+            if len(batch) >= batch_size:
+                await importer.write(batch)
+                batch = []
+                print(f"{kind}: {read} rows read, {importer.inserted} inserted")
+        if batch:
+            await importer.write(batch)
+        await importer.finish()
+    return {
+        "read": read,
+        "inserted": importer.inserted,
+        "invalid": errors,
+        "rejected": importer.rejected,
+    }
+
+
+async def run(args) -> dict:
+    try:
+        return await import_file(
+            args.kind, args.file, args.format, args.batch_size, args.copy
+        )
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import users, recipes or likes")
+    parser.add_argument("kind", choices=sorted(SCHEMAS))
+    parser.add_argument("file", help="NDJSON or CSV file, optionally .gz")
+    parser.add_argument("--format", choices=["ndjson", "csv"])
+    parser.add_argument("--batch-size", type=int, default=settings.import_batch_size)
+    parser.add_argument(
+        "--copy", action="store_true", help="use COPY on Postgres (tables without the rows)"
+    )
+    report = asyncio.run(run(parser.parse_args()))
+    print(
+        f"Done: {report['read']} rows read, {report['inserted']} inserted, "
+        f"{report['invalid']} invalid, {report['rejected']} rejected"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -45,6 +45,84 @@ class Settings(BaseSettings):
     algorithm: str
     access_token_expire_minutes: int
 
+    # Authenticated principals cached per token (entries never outlive the token itself)
+    principal_cache_max_entries: int = Field(default=10_000)
+    principal_cache_ttl_seconds: float = Field(default=300.0)
+
+    # Password hashing (bcrypt cost factor, hashing threads default to the core count)
+    bcrypt_rounds: int = Field(default=12)
+    password_hash_workers: Optional[int] = Field(default=None)
+    password_hash_max_pending: int = Field(default=64)
+
+    # Recipe detail cache (per worker process, entries also expire after the TTL)
+    recipe_cache_enabled: bool = Field(default=True)
+    recipe_cache_max_entries: int = Field(default=10_000)
+    recipe_cache_ttl_seconds: float = Field(default=60.0)
+
+    # Write-behind like counters (Like rows are written right away, Recipe.likes in batches)
+    like_buffer_enabled: bool = Field(default=False)
+    like_buffer_flush_interval_seconds: float = Field(default=1.0)
+    like_buffer_flush_threshold: int = Field(default=500)
+
+    # Image uploads
+    upload_dir: str = Field(default="app/static/images")
+    max_upload_bytes: int = Field(default=10 * 1024 * 1024)
+    # room for the other fields of an upload form, on top of the image
+    max_form_fields_bytes: int = Field(default=1024 * 1024)
+
+    # Image variants (worker processes default to the core count, Pillow must be installed)
+    image_workers: Optional[int] = Field(default=None)
+
+    # Database engine and connection pool
+    db_echo: bool = Field(default=False)
+    db_pool_size: int = Field(default=5)
+    db_max_overflow: int = Field(default=10)
+    db_pool_timeout: float = Field(default=30.0)
+    db_pool_recycle: int = Field(default=1800)
+    db_pool_pre_ping: bool = Field(default=True)
+    db_statement_cache_size: int = Field(default=100)
+
+    # Query accounting (requests over the budget and slower statements are logged)
+    query_budget_per_request: int = Field(default=10)
+    slow_query_threshold_ms: float = Field(default=200.0)
+
+    # Trending ranking (rebuilt from recent likes, then refreshed with the likes since the last run)
+    trending_enabled: bool = Field(default=True)
+    trending_half_life_hours: float = Field(default=24.0)
+    trending_refresh_interval_seconds: float = Field(default=30.0)
+    trending_rebuild_interval_seconds: float = Field(default=3600.0)
+    trending_max_entries: int = Field(default=1000)
+
+    # Catalog export (rows per server-side cursor batch) and import (rows per insert and commit)
+    export_batch_size: int = Field(default=1000)
+    import_batch_size: int = Field(default=5000)
+
+    # Admission control (concurrent requests and queue length per request class, 503 beyond)
+    admission_enabled: bool = Field(default=True)
+    admission_read_limit: int = Field(default=64)
+    admission_read_queue: int = Field(default=256)
+    admission_write_limit: int = Field(default=16)
+    admission_write_queue: int = Field(default=64)
+    admission_auth_limit: int = Field(default=8)
+    admission_auth_queue: int = Field(default=32)
+    admission_queue_timeout_seconds: float = Field(default=2.0)
+
+    # Login attempts per client (token bucket refilled per minute, up to the burst)
+    login_rate_per_minute: float = Field(default=10.0)
+    login_burst: int = Field(default=5)
+
+    # Identical concurrent reads share one query (results are dropped once it completes)
+    single_flight_enabled: bool = Field(default=True)
+    single_flight_max_keys: int = Field(default=1000)
+
+    # Read replicas for the read-only endpoints (a JSON list or comma separated URLs)
+    read_database_urls: Optional[str] = Field(default=None)
+    replica_selection: str = Field(default="round_robin")  # or least_loaded
+    replica_failure_cooldown_seconds: float = Field(default=30.0)
+    replica_health_check_interval_seconds: float = Field(default=5.0)
+    # after a write, the client's reads go to the primary for this long (replication lag)
+    primary_sticky_seconds: int = Field(default=5)
+
     class Config:
         env_file = ".env"
 
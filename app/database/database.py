@@ -1,5 +1,11 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import text, make_url
+from sqlalchemy.exc import DBAPIError
+from fastapi import Request
+from app.database.pool import InstrumentedQueuePool
+from app.database.query_stats import install_query_hooks
+from app.database.replicas import ReplicaSet, parse_database_urls
 from app.config.config import settings
 import asyncpg
 
@@ -15,23 +21,110 @@ else:
 
 
 
+def engine_options(url: str) -> dict:
+    """
+    Build the engine keyword arguments from the settings.
+    SQLite keeps SQLAlchemy's default pool, it has no server connections to size.
+    """
+    url = make_url(url)
+    options = {"echo": settings.db_echo}
+    if url.get_backend_name() != "sqlite":
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=settings.db_pool_pre_ping,
+        )
+    if url.get_driver_name() == "asyncpg":
+        # asyncpg's own statement cache and SQLAlchemy's prepared statement cache per connection
+        options["connect_args"] = {
+            "statement_cache_size": settings.db_statement_cache_size,
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+        }
+    return options
+
+
 # Create the engine
-engine = create_async_engine(DATABASE_URL, echo=True)
+engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+install_query_hooks(engine, settings.slow_query_threshold_ms / 1000)
 
 # create the session
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+# optional read replicas, configured exactly like the primary
+READ_DATABASE_URLS = parse_database_urls(settings.read_database_urls)
+replica_engines = [
+    create_async_engine(url, **engine_options(url)) for url in READ_DATABASE_URLS
+]
+for replica_engine in replica_engines:
+    install_query_hooks(replica_engine, settings.slow_query_threshold_ms / 1000)
+ReplicaSessions = [
+    sessionmaker(replica_engine, class_=AsyncSession, expire_on_commit=False)
+    for replica_engine in replica_engines
+]
+replicas = ReplicaSet(
+    replica_engines,
+    selection=settings.replica_selection,
+    cooldown=settings.replica_failure_cooldown_seconds,
+    health_check_interval=settings.replica_health_check_interval_seconds,
+)
+
+# set on responses to writes, its holder reads from the primary until it expires
+PRIMARY_STICKY_COOKIE = "read_primary"
+
 # create the base class
 Base = declarative_base()
 
 
+# columns added after the first deployment, create_all does not alter existing tables
+SCHEMA_UPGRADES = {
+    "postgresql": [
+        "ALTER TABLE recipes ADD COLUMN IF NOT EXISTS version integer NOT NULL DEFAULT 1",
+        "ALTER TABLE recipes ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT now()",
+        # likes from before the column get their recipe's creation time rather than the time of
+        # the upgrade, so they do not count as fresh activity in the trending ranking
+        "ALTER TABLE likes ADD COLUMN IF NOT EXISTS created_at timestamptz",
+        "UPDATE likes SET created_at = coalesce("
+        "(SELECT recipes.created_at FROM recipes WHERE recipes.id = likes.recipe_id), 'epoch'"
+        ") WHERE created_at IS NULL",
+        "ALTER TABLE likes ALTER COLUMN created_at SET DEFAULT now()",
+        "ALTER TABLE likes ALTER COLUMN created_at SET NOT NULL",
+    ],
+}
+
+
 # function to create the tables upon startup of the application
 async def create_db_and_tables():
     async with engine.begin() as connection:
         await connection.run_sync(Base.metadata.create_all)
+        for statement in SCHEMA_UPGRADES.get(connection.dialect.name, []):
+            await connection.execute(text(statement))
+        await connection.run_sync(create_missing_indexes)
         print("DB created and tables initialized")
 
 
+# create_all only creates indexes together with their table, so add indexes declared later on
+def create_missing_indexes(connection):
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+# live statistics of the connection pools, keyed by engine name
+def pool_statistics() -> dict:
+    engines = {"primary": engine}
+    for index, replica_engine in enumerate(replica_engines):
+        engines[f"replica{index}"] = replica_engine
+    statistics = {}
+    for name, named_engine in engines.items():
+        pool = named_engine.sync_engine.pool
+        if isinstance(pool, InstrumentedQueuePool):
+            statistics[name] = pool.statistics()
+    return statistics
+
+
 # function to get the database and be able to make queries
 async def get_db():
     db = AsyncSessionLocal()
@@ -42,3 +135,34 @@ async def get_db():
         raise
     finally:
         await db.close()
+
+
+# whether a session reads from the primary (replica reads may lag behind the latest writes)
+def is_primary(db: AsyncSession) -> bool:
+    return db.bind is engine
+
+
+# session for read-only endpoints: a replica when one is configured and healthy, else the primary
+# clients that just wrote (sticky cookie) keep reading from the primary until replication caught up
+# the session connects on its first query only, cache hits and 304s never touch the database
+async def get_read_db(request: Request):
+    index = None
+    if replica_engines and PRIMARY_STICKY_COOKIE not in request.cookies:
+        index = replicas.choose()
+    if index is None:
+        db = AsyncSessionLocal()
+    else:
+        db = ReplicaSessions[index]()
+    try:
+        yield db
+    except (DBAPIError, OSError) as e:
+        # a replica that can not be reached is skipped until its health check passes again,
+        # the request itself still fails
+        if index is not None and (
+            isinstance(e, OSError) or e.connection_invalidated
+        ):
+            print(f"Issue with read replica {index}, skipping it until it recovers: {e}")
+            replicas.mark_failed(index)
+        raise
+    finally:
+        await db.close()
@@ -0,0 +1,133 @@
+from sqlalchemy import update, bindparam, func
+from app.database.database import engine
+from app.database.models.recipe import Recipe
+from app.cache.recipe_cache import recipe_cache
+from app.config.config import settings
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+recipes_table = Recipe.__table__
+
+# one statement, executed with one parameter set per recipe
+FLUSH_STATEMENT = (
+    update(recipes_table)
+    .where(recipes_table.c.id == bindparam("b_id"))
+    .values(
+        likes=recipes_table.c.likes + bindparam("b_delta"),
+        version=recipes_table.c.version + 1,
+        updated_at=func.now(),
+    )
+)
+
+
+class LikeCounterBuffer:
+    """
+    Write-behind aggregation of `Recipe.likes` deltas.
+
+    When enabled, like/unlike only record the `Like` row and add their +1/-1 here. The deltas are
+    summed per recipe in memory and written in one batch every `flush_interval` seconds, as soon as
+    `flush_threshold` changes are pending, and on shutdown. A viral recipe then takes one row update
+    per flush instead of one per like.
+    Reads in this worker add `pending_delta` to the stored count, so a user always sees their own like.
+    """
+
+    def __init__(self, enabled: bool, flush_interval: float, flush_threshold: int):
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.pending: dict[int, int] = {}
+        # deltas taken by a running flush stay visible to readers until they are committed
+        self.flushing: dict[int, int] = {}
+        self.changes = 0
+        self.flushes = 0
+        self.flushed_recipes = 0
+        self.flush_errors = 0
+        self._flush_requested = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    def add(self, recipe_id: int, delta: int) -> None:
+        self.pending[recipe_id] = self.pending.get(recipe_id, 0) + delta
+        self.changes += 1
+        if self.changes >= self.flush_threshold:
+            self._flush_requested.set()
+
+    def pending_delta(self, recipe_id: int) -> int:
+        return self.pending.get(recipe_id, 0) + self.flushing.get(recipe_id, 0)
+
+    async def flush(self) -> None:
+        """
+        Write all pending deltas in one transaction.
+        On failure the deltas are put back and retried on the next flush.
+        """
+        async with self._lock:
+            batch = {id: delta for id, delta in self.pending.items() if delta}
+            self.pending = {}
+            self.changes = 0
+            if not batch:
+                return
+            self.flushing = batch
+            try:
+                async with engine.begin() as connection:
+                    await connection.execute(
+                        FLUSH_STATEMENT,
+                        [{"b_id": id, "b_delta": delta} for id, delta in batch.items()],
+                    )
+            except Exception:
+                self.flush_errors += 1
+                for id, delta in batch.items():
+                    self.pending[id] = self.pending.get(id, 0) + delta
+                raise
+            finally:
+                self.flushing = {}
+            self.flushes += 1
+            self.flushed_recipes += len(batch)
+        # cached payloads hold the stored count, which just moved
+        for id in batch:
+            await recipe_cache.invalidate(id)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._flush_requested.wait(), timeout=self.flush_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning("Issue with flushing like counters: %s", e)
+
+    def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "pending_recipes": len(self.pending),
+            "pending_changes": self.changes,
+            "flushes": self.flushes,
+            "flushed_recipes": self.flushed_recipes,
+            "flush_errors": self.flush_errors,
+        }
+
+
+like_buffer = LikeCounterBuffer(
+    enabled=settings.like_buffer_enabled,
+    flush_interval=settings.like_buffer_flush_interval_seconds,
+    flush_threshold=settings.like_buffer_flush_threshold,
+)
@@ -1,8 +1,9 @@
 from app.database.database import Base
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Index
 from sqlalchemy.sql.sqltypes import TIMESTAMP
 from sqlalchemy.sql.expression import text
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 
 class Like(Base):
@@ -14,3 +15,10 @@ class Like(Base):
     recipe_id = Column(
         Integer, ForeignKey("recipes.id", ondelete="CASCADE"), primary_key=True
     )
+    # when the like was given, the trending ranking decays likes by their age
+    created_at = Column(
+        TIMESTAMP(timezone=True), nullable=False, server_default=func.now()
+    )
+
+    # the trending job reads the likes given since its last run
+    __table_args__ = (Index("ix_likes_created_at", "created_at"),)
@@ -1,5 +1,5 @@
 from app.database.database import Base
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Index
 from sqlalchemy.sql.sqltypes import TIMESTAMP
 from sqlalchemy.sql.expression import text
 from sqlalchemy.orm import relationship
@@ -16,10 +16,24 @@ class Recipe(Base):
     image_path = Column(String, nullable=True)
     likes = Column(Integer, nullable=False, server_default=text("0"))
     created_at = Column(
-        TIMESTAMP(timezone=True), nullable=False, server_default=text("now()")
+        TIMESTAMP(timezone=True), nullable=False, server_default=func.now()
     )
-    
+    # bumped on every change (edits and likes), drives the ETags of the recipe endpoints
+    version = Column(Integer, nullable=False, server_default=text("1"))
+    updated_at = Column(
+        TIMESTAMP(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+
     owner_id = Column(
         Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )
     owner = relationship("User")
+
+    # keyset pagination walks these indexes backwards instead of skipping offset rows
+    __table_args__ = (
+        Index("ix_recipes_created_at_id", "created_at", "id"),
+        Index("ix_recipes_likes_id", "likes", "id"),
+    )
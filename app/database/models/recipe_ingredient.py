@@ -0,0 +1,16 @@
+from app.database.database import Base
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+
+
+# one row per normalized ingredient token of a recipe (an inverted index of Recipe.ingredients)
+class RecipeIngredient(Base):
+    __tablename__ = "recipe_ingredients"
+
+    # token first, so looking up the recipes of a token reads one range of the primary key
+    token = Column(String, primary_key=True)
+    recipe_id = Column(
+        Integer, ForeignKey("recipes.id", ondelete="CASCADE"), primary_key=True
+    )
+
+    # replacing the tokens of a recipe on update and delete
+    __table_args__ = (Index("ix_recipe_ingredients_recipe_id", "recipe_id"),)
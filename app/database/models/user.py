@@ -2,6 +2,7 @@ from app.database.database import Base
 from sqlalchemy import Column, Integer, String
 from sqlalchemy.sql.sqltypes import TIMESTAMP
 from sqlalchemy.sql.expression import text
+from sqlalchemy.sql import func
 
 # create User class and table with columns
 class User(Base):
@@ -10,4 +11,4 @@ class User(Base):
     id = Column(Integer, primary_key=True, nullable=False)
     email = Column(String, unique=True, nullable=False)
     password = Column(String, nullable=False)
-    created_at = Column(TIMESTAMP(timezone=True), server_default=text("now()"))
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
@@ -0,0 +1,100 @@
+from contextvars import ContextVar
+from sqlalchemy import event
+import logging
+import re
+import time
+
+"""
+Per-request SQL accounting.
+
+Cursor execution hooks on an engine count the queries and the time spent in the database for the
+request running in the current context, and log statements slower than the configured threshold.
+SQLAlchemy runs the sync events inside the greenlet of the awaiting task, which shares the task's
+context, so the request's `QueryStats` is visible to the hooks.
+"""
+
+logger = logging.getLogger(__name__)
+
+WHITESPACE = re.compile(r"\s+")
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+# positional (?, $1) and named (:name, %(name)s) placeholders
+PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|(?<!:):\w+|\?")
+PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+class QueryStats:
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+current_query_stats: ContextVar[QueryStats | None] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Reduce a statement to its shape, so the same query with different values or IN list lengths
+    reads the same in the log.
+    """
+    statement = STRING_LITERAL.sub("?", statement)
+    statement = PLACEHOLDER.sub("?", statement)
+    statement = NUMBER_LITERAL.sub("?", statement)
+    statement = PLACEHOLDER_LIST.sub("(?, ...)", statement)
+    return WHITESPACE.sub(" ", statement).strip()
+
+
+def parameter_shape(parameters, executemany: bool) -> str:
+    """
+    Describe the bound parameters by type only, values never end up in the log.
+    """
+    if executemany:
+        rows = list(parameters or [])
+        first = parameter_shape(rows[0], False) if rows else "()"
+        return f"{len(rows)} x {first}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(
+            f"{name}: {type(value).__name__}" for name, value in parameters.items()
+        ) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+def install_query_hooks(engine, slow_query_seconds: float):
+    """
+    Register the accounting hooks on an engine (the sync engine behind an async one).
+    Every engine the app queries through should get them, so the counts cover all of a request.
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += elapsed
+        if elapsed >= slow_query_seconds:
+            logger.warning(
+                "Slow query (%.1f ms) on %s: %s params=%s",
+                elapsed * 1000,
+                sync_engine.url.render_as_string(hide_password=True),
+                normalize_sql(statement),
+                parameter_shape(parameters, executemany),
+            )
+
+    # a failed statement never reaches after_cursor_execute, drop its start time
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start"):
+            connection.info["query_start"].pop()
@@ -0,0 +1,139 @@
+from sqlalchemy import text
+import asyncio
+import itertools
+import json
+import logging
+import time
+
+"""
+Selection of the read replica serving a read-only request.
+
+Requests never test a replica before using it (that would cost a pool checkout and a round trip
+even on cache hits and 304s). Instead a background job probes every replica each
+`health_check_interval` seconds, and a replica whose connection fails, in a probe or in a request,
+is skipped until a probe reaches it again.
+"""
+
+logger = logging.getLogger(__name__)
+
+SELECTION_STRATEGIES = ("round_robin", "least_loaded")
+
+
+def parse_database_urls(value: str | None) -> list[str]:
+    """
+    Parse a JSON list (`["postgresql+asyncpg://...", ...]`) or comma separated URLs.
+    Use the JSON form for URLs that contain commas.
+    """
+    if not value or not value.strip():
+        return []
+    value = value.strip()
+    if value.startswith("["):
+        return [str(url) for url in json.loads(value)]
+    return [url.strip() for url in value.split(",") if url.strip()]
+
+
+class ReplicaSet:
+    """
+    Picks a replica by round robin or by the fewest checked out connections, skipping replicas
+    that failed within the last `cooldown` seconds. Returns None when no replica is usable, the
+    caller then reads from the primary.
+    """
+
+    def __init__(
+        self,
+        engines: list,
+        selection: str,
+        cooldown: float,
+        health_check_interval: float = 5.0,
+    ):
+        if selection not in SELECTION_STRATEGIES:
+            raise ValueError(
+                f"replica_selection must be one of {', '.join(SELECTION_STRATEGIES)}"
+            )
+        self.engines = engines
+        self.selection = selection
+        self.cooldown = cooldown
+        self.health_check_interval = health_check_interval
+        self._unhealthy_until = [0.0] * len(engines)
+        self._next = itertools.count()
+        self.selected = [0] * len(engines)
+        self.failures = [0] * len(engines)
+        self.primary_fallbacks = 0
+        self._task = None
+
+    def _load(self, index: int) -> int:
+        pool = self.engines[index].sync_engine.pool
+        checkedout = getattr(pool, "checkedout", None)
+        return checkedout() if checkedout is not None else 0
+
+    def choose(self) -> int | None:
+        now = time.monotonic()
+        healthy = [
+            index
+            for index, until in enumerate(self._unhealthy_until)
+            if until <= now
+        ]
+        if not healthy:
+            if self.engines:
+                self.primary_fallbacks += 1
+            return None
+        if self.selection == "least_loaded":
+            index = min(healthy, key=self._load)
+        else:
+            index = healthy[next(self._next) % len(healthy)]
+        self.selected[index] += 1
+        return index
+
+    def mark_failed(self, index: int) -> None:
+        self.failures[index] += 1
+        self._unhealthy_until[index] = time.monotonic() + self.cooldown
+
+    async def check(self) -> None:
+        """
+        Probe every replica with `SELECT 1`: a failure takes it out of rotation, a success puts it
+        back right away instead of waiting for the end of its cooldown.
+        """
+        for index, engine in enumerate(self.engines):
+            try:
+                async with engine.connect() as connection:
+                    await asyncio.wait_for(
+                        connection.execute(text("SELECT 1")), self.health_check_interval
+                    )
+            except Exception as e:
+                logger.warning("Read replica %s failed its health check: %s", index, e)
+                self.mark_failed(index)
+            else:
+                self._unhealthy_until[index] = 0.0
+
+    async def _run(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.health_check_interval)
+
+    def start(self) -> None:
+        if self.engines and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        stats = {
+            f"replica{index}": {
+                "healthy": int(self._unhealthy_until[index] <= now),
+                "selected": self.selected[index],
+                "failures": self.failures[index],
+                "load": self._load(index),
+            }
+            for index in range(len(self.engines))
+        }
+        # reads that went to the primary because every replica was cooling down
+        stats["primary"] = {"fallbacks": self.primary_fallbacks}
+        return stats
@@ -4,26 +4,165 @@ from app.config.config import settings
 from app.database import database
 from app.database.models.like import Like
 from app.database.models.recipe import Recipe
+from app.database.models.recipe_ingredient import RecipeIngredient
 from app.database.models.user import User
-from app.routers import user, recipe
-from fastapi.staticfiles import StaticFiles
+from app.routers import user, recipe, metrics
+from app.search import recipe_search
+from app.database.like_buffer import like_buffer
+from app.media import derivatives
+from app.media.static_files import ImmutableStaticFiles
+from app.metrics.registry import metrics_registry
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.middleware.admission import AdmissionMiddleware, Budget, TokenBucket
+from app.middleware.body_limit import BodyLimitMiddleware
+from app.middleware.sticky_primary import StickyPrimaryMiddleware
+from app.cache.recipe_cache import recipe_cache
+from app.cache.single_flight import single_flight
+from app.auth.principal_cache import principal_cache
+from app.utils.password_hash import password_hasher
+from app.ranking.trending import trending
+
+# concurrency budgets per request class, shared with the metrics below
+admission_budgets = {
+    "read": Budget(
+        "read",
+        settings.admission_read_limit,
+        settings.admission_read_queue,
+        settings.admission_queue_timeout_seconds,
+    ),
+    "write": Budget(
+        "write",
+        settings.admission_write_limit,
+        settings.admission_write_queue,
+        settings.admission_queue_timeout_seconds,
+    ),
+    "auth": Budget(
+        "auth",
+        settings.admission_auth_limit,
+        settings.admission_auth_queue,
+        settings.admission_queue_timeout_seconds,
+    ),
+}
+login_limiter = TokenBucket(
+    rate=settings.login_rate_per_minute / 60, burst=settings.login_burst
+)
 
 # initialize the fastapi instance and configure middleware for cors
 app = FastAPI()
+# innermost, so rejected requests still get the CORS headers and show up in the metrics
+if settings.admission_enabled:
+    app.add_middleware(
+        AdmissionMiddleware,
+        budgets=admission_budgets,
+        auth_paths=["/users/login", "/users/register"],
+        login_path="/users/login",
+        login_limiter=login_limiter,
+        excluded_prefixes=["/metrics", "/static"],
+    )
+# oversized uploads are refused before they are parsed (and before they take an admission slot)
+app.add_middleware(
+    BodyLimitMiddleware,
+    max_body_bytes=settings.max_upload_bytes + settings.max_form_fields_bytes,
+)
+# with read replicas, clients that just wrote read from the primary for a few seconds
+if database.replica_engines:
+    app.add_middleware(
+        StickyPrimaryMiddleware,
+        cookie_name=database.PRIMARY_STICKY_COOKIE,
+        max_age=settings.primary_sticky_seconds,
+    )
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # allow all hosts/urls to access the api
     allow_credentials=True,
     allow_methods=["*"],  # Allow all methods (GET, POST, PUT, DELETE, etc.)
     allow_headers=["*"],  # Allow all headers
+    # let browser clients read the pagination cursor and the validators for conditional requests
+    expose_headers=["X-Next-Cursor", "ETag", "Server-Timing"],
+)
+# uploaded images never change, so they are served with long-lived immutable caching
+app.mount(
+    "/static",
+    ImmutableStaticFiles(directory="app/static", immutable_dirs=["images"]),
+    name="static",
+)
+# count the queries and database time of every request (Server-Timing header)
+app.add_middleware(QueryStatsMiddleware, query_budget=settings.query_budget_per_request)
+# outermost middleware, so the latency includes everything the other middleware does
+app.add_middleware(MetricsMiddleware, registry=metrics_registry)
+
+# component statistics are read on every scrape of /metrics
+# the listed statistics only ever grow and are exposed as counters
+metrics_registry.register_collector(
+    "db_pool",
+    database.pool_statistics,
+    label="engine",
+    counters=["checkouts", "checkout_timeouts", "wait_seconds_total"],
+)
+metrics_registry.register_collector(
+    "replicas",
+    database.replicas.stats,
+    label="engine",
+    counters=["selected", "failures", "fallbacks"],
+)
+metrics_registry.register_collector(
+    "recipe_cache",
+    recipe_cache.stats,
+    counters=["hits", "misses", "evictions", "expirations", "invalidations"],
+)
+metrics_registry.register_collector(
+    "single_flight",
+    single_flight.stats,
+    counters=["leaders", "followers", "bypassed", "leader_cancellations"],
+)
+metrics_registry.register_collector(
+    "principal_cache",
+    principal_cache.stats,
+    counters=["hits", "misses", "evictions", "revocations"],
+)
+metrics_registry.register_collector(
+    "like_buffer",
+    like_buffer.stats,
+    counters=["flushes", "flushed_recipes", "flush_errors"],
+)
+metrics_registry.register_collector(
+    "password_hasher", password_hasher.stats, counters=["rejected"]
+)
+metrics_registry.register_collector(
+    "trending",
+    trending.stats,
+    counters=["rebuilds", "refreshes", "refresh_errors", "counted_likes"],
+)
+metrics_registry.register_collector(
+    "admission",
+    lambda: {name: budget.stats() for name, budget in admission_budgets.items()},
+    label="budget",
+    counters=["admitted", "rejected_queue_full", "rejected_timeout"],
+)
+metrics_registry.register_collector(
+    "login_limiter", login_limiter.stats, counters=["limited"]
 )
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
 
 # create db and tables if required
 @app.on_event("startup")
 async def on_startup():
     await database.create_db_and_tables()
+    async with database.engine.begin() as connection:
+        await recipe_search.create_search_index(connection)
+    like_buffer.start()
+    trending.start()
+    database.replicas.start()
+
+
+# write the buffered like counters and stop the background jobs before the worker exits
+@app.on_event("shutdown")
+async def on_shutdown():
+    await database.replicas.stop()
+    await trending.stop()
+    await like_buffer.stop()
+    derivatives.shutdown()
 
 
 # make first default route
@@ -34,3 +173,4 @@ async def root():
 
 app.include_router(user.router)
 app.include_router(recipe.router)
+app.include_router(metrics.router)
@@ -0,0 +1,50 @@
+from concurrent.futures import ProcessPoolExecutor
+from app.media import derivatives
+from app.config.config import settings
+import argparse
+import os
+
+"""
+Generate the missing variants of every image already in the upload directory.
+
+Usage:
+    python -m app.media.backfill_variants [--workers N]
+"""
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".webp")
+
+
+def _generate(source_path: str):
+    try:
+        written = derivatives.generate_variants(source_path, derivatives.variants_dir())
+        return source_path, len(written), None
+    except Exception as e:
+        return source_path, 0, str(e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill image variants")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    if derivatives.Image is None:
+        raise SystemExit("Pillow is not installed, cannot generate variants")
+
+    sources = [
+        entry.path
+        for entry in os.scandir(settings.upload_dir)
+        if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS)
+    ]
+    written = 0
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for source_path, count, error in pool.map(_generate, sources, chunksize=4):
+            if error:
+                failed += 1
+                print(f"Issue with {source_path}: {error}")
+            written += count
+    print(f"Processed {len(sources)} images, wrote {written} variants, {failed} failed")
+
+
+if __name__ == "__main__":
+    main()
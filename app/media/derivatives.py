@@ -0,0 +1,147 @@
+from concurrent.futures import ProcessPoolExecutor
+from app.config.config import settings
+from app.media.uploads import PUBLIC_PREFIX
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional, without it recipes are served without variants
+    Image = None
+
+"""
+Resized variants of uploaded images.
+
+Every uploaded image gets a thumbnail, a card and a full size version, re-encoded as WebP and
+never upscaled. Resizing is CPU bound, so it runs in a process pool and the API workers only wait
+for the result. Variants are named after the original file, which is itself named after its
+content hash, so an already generated variant never needs to be generated again.
+"""
+
+logger = logging.getLogger(__name__)
+
+# longest side in pixels of every variant
+VARIANTS = {"thumbnail": 160, "card": 480, "full": 1280}
+VARIANT_FORMAT = "webp"
+VARIANT_QUALITY = 80
+VARIANTS_DIR = "variants"
+
+# generated variant names per image stem, with the time they were looked up. Variants are never
+# deleted, so a complete set is kept for good; an incomplete one (legacy uploads before the
+# backfill, no Pillow, a failed encode) is looked up again after the ttl, since another worker or
+# the backfill may write its variants meanwhile
+VARIANT_LOOKUP_TTL_SECONDS = 60.0
+MAX_KNOWN_IMAGES = 100_000
+_known_variants: dict[str, tuple[tuple[str, ...], float]] = {}
+
+_pool = None
+
+
+def variants_dir() -> str:
+    return os.path.join(settings.upload_dir, VARIANTS_DIR)
+
+
+def _generated_variants(stem: str) -> tuple[str, ...]:
+    now = time.monotonic()
+    known = _known_variants.get(stem)
+    if known is not None:
+        names, checked_at = known
+        if len(names) == len(VARIANTS) or now - checked_at < VARIANT_LOOKUP_TTL_SECONDS:
+            return names
+    names = tuple(
+        name
+        for name in VARIANTS
+        if os.path.isfile(
+            os.path.join(variants_dir(), f"{stem}_{name}.{VARIANT_FORMAT}")
+        )
+    )
+    if len(_known_variants) >= MAX_KNOWN_IMAGES:
+        _known_variants.clear()
+    _known_variants[stem] = (names, now)
+    return names
+
+
+def variant_urls(image_path):
+    """
+    Return the public urls of the generated variants of an uploaded image, keyed by variant name.
+    Only variants present in the variants directory are listed, so images that failed to resize
+    (or were uploaded while Pillow was missing) keep pointing at the original. The directory is
+    looked up once per image and ttl, not per request.
+    Returns None when the recipe has no uploaded image or no variant was generated.
+    """
+    if not image_path or not image_path.startswith(PUBLIC_PREFIX + "/"):
+        return None
+    stem = os.path.splitext(os.path.basename(image_path))[0]
+    urls = {
+        name: f"{PUBLIC_PREFIX}/{VARIANTS_DIR}/{stem}_{name}.{VARIANT_FORMAT}"
+        for name in _generated_variants(stem)
+    }
+    return urls or None
+
+
+def generate_variants(source_path: str, output_dir: str) -> list[str]:
+    """
+    Write the missing variants of an image file. Runs inside a worker process.
+
+    Returns:
+        list[str]: The paths of the variants written by this call.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    written = []
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        for name, size in VARIANTS.items():
+            target = os.path.join(output_dir, f"{stem}_{name}.{VARIANT_FORMAT}")
+            if os.path.exists(target):
+                continue
+            variant = image.copy()
+            variant.thumbnail((size, size), Image.LANCZOS)
+            # write next to the target and rename, so a variant is never served half written
+            partial = f"{target}.part"
+            variant.save(partial, format="WEBP", quality=VARIANT_QUALITY, method=4)
+            os.replace(partial, target)
+            written.append(target)
+    return written
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn, forking a process that runs an event loop and threads is not safe
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.image_workers or os.cpu_count() or 1,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+async def create_variants(image_path) -> None:
+    """
+    Generate the variants of an uploaded image in the process pool.
+    A broken image is logged and skipped, it never fails the recipe write.
+    """
+    if Image is None or not image_path:
+        return
+    source_path = os.path.join(settings.upload_dir, os.path.basename(image_path))
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(
+            _get_pool(), generate_variants, source_path, variants_dir()
+        )
+    except Exception as e:
+        logger.warning("Issue with generating variants of %s: %s", image_path, e)
+    # the image may have been listed without variants before they were written
+    _known_variants.pop(os.path.splitext(os.path.basename(image_path))[0], None)
+
+
+def shutdown() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
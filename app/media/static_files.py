@@ -0,0 +1,121 @@
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse
+import hashlib
+import mimetypes
+import os
+import re
+
+"""
+Static file serving tuned for uploaded images.
+
+Uploaded files are named after their content (or a random uuid for older uploads) and never
+change, so everything under the immutable directories is sent with a one year
+`Cache-Control: immutable` and a strong ETag. Browsers then skip the request entirely, and any
+revalidation is answered with a 304.
+Range requests and conditional requests are handled by Starlette's FileResponse, which also
+hands the file to the server for zero-copy sending when the server supports the
+`http.response.pathsend` extension.
+"""
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+# bigger chunks mean fewer event loop round trips when the server cannot sendfile
+CHUNK_SIZE = 1024 * 1024
+
+# sibling files served instead of the original when the client accepts the encoding
+PRECOMPRESSED_ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+CONTENT_HASH_PATTERN = re.compile(r"^[0-9a-f]{64}")
+
+
+class TaggedFileResponse(FileResponse):
+    def _should_use_range(self, http_if_range: str, *args) -> bool:
+        # Starlette compares If-Range with an ETag of its own, not the one this response carries,
+        # so resumed downloads would always restart from the first byte
+        return http_if_range == self.headers.get("etag") or super()._should_use_range(
+            http_if_range, *args
+        )
+
+
+class ImmutableStaticFiles(StaticFiles):
+    def __init__(self, *args, immutable_dirs: list[str] | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.immutable_roots = [
+            os.path.realpath(os.path.join(self.directory, name))
+            for name in immutable_dirs or []
+        ]
+
+    def is_immutable(self, full_path: str) -> bool:
+        real_path = os.path.realpath(full_path)
+        return any(real_path.startswith(root + os.sep) for root in self.immutable_roots)
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        request_headers = Headers(scope=scope)
+        media_type = mimetypes.guess_type(full_path)[0] or "text/plain"
+        immutable = self.is_immutable(full_path)
+        # images are already compressed, only other assets are looked up precompressed
+        path, encoding = full_path, None
+        if not immutable:
+            path, encoding = self.precompressed_variant(full_path, request_headers)
+            if encoding:
+                stat_result = os.stat(path)
+
+        response = TaggedFileResponse(
+            path,
+            status_code=status_code,
+            stat_result=stat_result,
+            media_type=media_type,
+        )
+        response.chunk_size = CHUNK_SIZE
+        response.headers["etag"] = self.strong_etag(full_path, stat_result, encoding)
+        if immutable:
+            response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response.headers["cache-control"] = REVALIDATE_CACHE_CONTROL
+            if encoding or self.has_precompressed(full_path):
+                response.headers["vary"] = "Accept-Encoding"
+        if encoding:
+            response.headers["content-encoding"] = encoding
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    @staticmethod
+    def strong_etag(full_path: str, stat_result, encoding) -> str:
+        # content addressed files already carry the hash of their bytes in their name
+        name = os.path.basename(full_path)
+        stem = os.path.splitext(name)[0]
+        if CONTENT_HASH_PATTERN.match(name) and len(stem) == 64:
+            tag = stem
+        elif CONTENT_HASH_PATTERN.match(name):
+            # derived files (`<hash>_card.webp`) share the hash of their source, tag the whole name
+            tag = hashlib.sha256(name.encode()).hexdigest()
+        else:
+            tag = f"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"
+        if encoding:
+            tag = f"{tag}-{encoding}"
+        return f'"{tag}"'
+
+    @staticmethod
+    def has_precompressed(full_path: str) -> bool:
+        return any(
+            os.path.isfile(full_path + suffix) for _, suffix in PRECOMPRESSED_ENCODINGS
+        )
+
+    @staticmethod
+    def precompressed_variant(full_path: str, request_headers: Headers):
+        """
+        Return the path to serve and its content encoding (None for the original file).
+        """
+        accepted = request_headers.get("accept-encoding", "")
+        if not accepted or "range" in request_headers:
+            return full_path, None
+        accepted = {value.split(";")[0].strip() for value in accepted.split(",")}
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+            if encoding in accepted and os.path.isfile(full_path + suffix):
+                return full_path + suffix, encoding
+        return full_path, None
@@ -0,0 +1,111 @@
+from fastapi import UploadFile, HTTPException
+from starlette.concurrency import run_in_threadpool
+from app.config.config import settings
+import hashlib
+import os
+import tempfile
+
+"""
+Image uploads.
+
+Uploads are streamed chunk by chunk into a temporary file, with the disk writes and the hashing
+done in the threadpool so the event loop never blocks on a multi-megabyte image.
+The real type is sniffed from the first bytes instead of trusting the filename, and the size is
+capped while streaming (a second guard, oversized request bodies are already refused before the
+form is parsed, see `app.middleware.body_limit`). Files are stored under the sha256 of their content, so uploading the same
+image twice stores it once.
+"""
+
+CHUNK_SIZE = 1024 * 1024
+
+# public url of the upload directory (app/static is mounted on /static)
+PUBLIC_PREFIX = "/static/images"
+
+# magic numbers of the accepted image types
+IMAGE_SIGNATURES = [
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+]
+
+
+def sniff_image_type(head: bytes):
+    """
+    Return the file extension matching the first bytes of an image, or None if it is not one.
+    """
+    for signature, extension in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def _write_chunk(file, hasher, chunk: bytes) -> None:
+    file.write(chunk)
+    hasher.update(chunk)
+
+
+def _store(temp_path: str, final_path: str) -> None:
+    if os.path.exists(final_path):
+        # same content is already stored, the upload costs no disk
+        os.remove(temp_path)
+    else:
+        os.replace(temp_path, final_path)
+
+
+def _discard(file, temp_path: str) -> None:
+    file.close()
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+
+async def save_image(upload: UploadFile):
+    """
+    Stream an uploaded image to the upload directory under its content hash.
+
+    Parameters:
+    - **upload**: The uploaded file from the multipart form.
+
+    Returns:
+    - The public path of the stored image (e.g. `/static/images/<sha256>.jpg`),
+      or None if the upload is empty.
+
+    Raises:
+    - **HTTPException 413** if the image is bigger than `max_upload_bytes`.
+    - **HTTPException 415** if the content is not a JPEG, PNG, GIF or WebP image.
+    """
+    upload_dir = settings.upload_dir
+    os.makedirs(upload_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=upload_dir, prefix=".upload-", suffix=".part")
+    file = os.fdopen(fd, "wb")
+    hasher = hashlib.sha256()
+    extension = None
+    size = 0
+    try:
+        while chunk := await upload.read(CHUNK_SIZE):
+            if extension is None:
+                extension = sniff_image_type(chunk)
+                if extension is None:
+                    raise HTTPException(
+                        status_code=415,
+                        detail="Only JPEG, PNG, GIF and WebP images are supported",
+                    )
+            size += len(chunk)
+            if size > settings.max_upload_bytes:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Image must not be bigger than {settings.max_upload_bytes} bytes",
+                )
+            await run_in_threadpool(_write_chunk, file, hasher, chunk)
+        await run_in_threadpool(file.close)
+        if extension is None:
+            await run_in_threadpool(_discard, file, temp_path)
+            return None
+        name = f"{hasher.hexdigest()}.{extension}"
+        await run_in_threadpool(_store, temp_path, os.path.join(upload_dir, name))
+    except BaseException:
+        await run_in_threadpool(_discard, file, temp_path)
+        raise
+    return f"{PUBLIC_PREFIX}/{name}"
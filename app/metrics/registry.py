@@ -0,0 +1,130 @@
+from bisect import bisect_left
+
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Recording a request is a few dict lookups and integer additions, histograms keep per-bucket counts
+and only become cumulative when rendered. Component statistics (pools, caches, buffers) are not
+recorded at all, they are read from their `stats()` when the endpoint is scraped. Statistics that
+only ever grow (hits, checkouts, rejections) are declared by their collector and exposed as
+counters with a `_total` suffix, so `rate()` handles them (and worker restarts) correctly.
+"""
+
+# latency buckets in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # one extra slot for observations above the last bucket (+Inf)
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.latency: dict[tuple[str, str], Histogram] = {}
+        self.responses: dict[tuple[str, str, int], int] = {}
+        self.in_flight: dict[str, int] = {}
+        self.collectors = []
+
+    def request_started(self, method: str) -> None:
+        # the route is only known once the request has been routed
+        self.in_flight[method] = self.in_flight.get(method, 0) + 1
+
+    def request_finished(self, method: str, route: str, status: int, seconds: float):
+        self.in_flight[method] -= 1
+        key = (method, route)
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency[key] = Histogram(self.buckets)
+        histogram.observe(seconds)
+        response_key = (method, route, status)
+        self.responses[response_key] = self.responses.get(response_key, 0) + 1
+
+    def register_collector(
+        self, prefix: str, stats, label: str | None = None, counters=()
+    ):
+        """
+        Expose the numbers returned by `stats()` as gauges named `app_<prefix>_<key>`, and the keys
+        listed in `counters` as counters named `app_<prefix>_<key>_total`.
+        When `label` is given, `stats()` returns one dict per instance, keyed by the label value.
+        """
+        self.collectors.append((prefix, stats, label, frozenset(counters)))
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by route template",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), histogram in sorted(self.latency.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, histogram.counts):
+                cumulative += count
+                labels = _labels(method=method, route=route, le=bound)
+                lines.append(f"http_request_duration_seconds_bucket{{{labels}}} {cumulative}")
+            labels = _labels(method=method, route=route)
+            lines.append(
+                f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}'
+            )
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {histogram.count}")
+
+        lines.append("# HELP http_responses_total Responses by route template and status")
+        lines.append("# TYPE http_responses_total counter")
+        for (method, route, status), count in sorted(self.responses.items()):
+            labels = _labels(method=method, route=route, status=status)
+            lines.append(f"http_responses_total{{{labels}}} {count}")
+
+        lines.append("# HELP http_requests_in_flight Requests being processed")
+        lines.append("# TYPE http_requests_in_flight gauge")
+        for method, count in sorted(self.in_flight.items()):
+            lines.append(f"http_requests_in_flight{{{_labels(method=method)}}} {count}")
+
+        for prefix, stats, label, counters in self.collectors:
+            lines.extend(self._render_collector(prefix, stats(), label, counters))
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_collector(prefix: str, stats: dict, label: str | None, counters):
+        if label is None:
+            stats = {None: stats}
+        samples: dict[tuple[str, str], list[str]] = {}
+        for instance, values in stats.items():
+            labels = f"{{{_labels(**{label: instance})}}}" if label else ""
+            for key, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"app_{prefix}_{key}"
+                kind = "gauge"
+                if key in counters:
+                    kind = "counter"
+                    if not name.endswith("_total"):
+                        name += "_total"
+                samples.setdefault((name, kind), []).append(f"{name}{labels} {value}")
+        lines = []
+        for (name, kind), values in samples.items():
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(values)
+        return lines
+
+
+metrics_registry = MetricsRegistry()
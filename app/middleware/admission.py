@@ -0,0 +1,173 @@
+from collections import OrderedDict
+import asyncio
+import math
+import orjson
+import time
+
+"""
+Admission control: every request class (cheap reads, writes, authentication) gets a budget of
+concurrently running requests and a bounded queue in front of it. A request that finds the queue
+full, or waits longer than the queue deadline, is answered `503` with `Retry-After` right away, so
+the requests that are admitted keep a bounded latency instead of everyone slowing down together.
+Logins additionally spend a token from a per-client bucket, an empty bucket is answered `429`.
+"""
+
+
+class Budget:
+    def __init__(self, name: str, limit: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(limit)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+
+    async def acquire(self) -> bool:
+        """
+        Wait for a slot, False when the queue is full or the deadline passes first.
+        """
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                self.rejected_queue_full += 1
+                return False
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected_timeout += 1
+                return False
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self.active += 1
+        self.admitted += 1
+        return True
+
+    def release(self) -> None:
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+        }
+
+
+class TokenBucket:
+    """
+    Per-client token buckets refilling at `rate` tokens per second up to `burst`.
+    Only the most recently seen `max_clients` are remembered, forgotten clients start full.
+    """
+
+    def __init__(self, rate: float, burst: int, max_clients: int = 100_000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self.limited = 0
+
+    def take(self, client: str) -> float:
+        """
+        Spend a token of `client`. Returns 0 when allowed, else the seconds until the next token.
+        """
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            retry_after = 0.0
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / self.rate
+            self.limited += 1
+        self._buckets[client] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    def stats(self) -> dict:
+        return {"clients": len(self._buckets), "limited": self.limited}
+
+
+async def _reject(send, status: int, detail: str, retry_after: float) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": orjson.dumps({"detail": detail})})
+
+
+class AdmissionMiddleware:
+    """
+    Pure ASGI middleware applying the budgets to every HTTP request outside `excluded_prefixes`.
+    """
+
+    READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+    def __init__(
+        self,
+        app,
+        budgets: dict[str, Budget],
+        auth_paths,
+        login_path: str,
+        login_limiter: TokenBucket,
+        excluded_prefixes=(),
+    ):
+        self.app = app
+        self.budgets = budgets
+        self.auth_paths = frozenset(auth_paths)
+        self.login_path = login_path
+        self.login_limiter = login_limiter
+        self.excluded_prefixes = tuple(excluded_prefixes)
+
+    def budget_for(self, scope) -> Budget | None:
+        path = scope["path"]
+        if path.startswith(self.excluded_prefixes):
+            return None
+        if path in self.auth_paths:
+            return self.budgets["auth"]
+        if scope["method"] in self.READ_METHODS:
+            return self.budgets["read"]
+        return self.budgets["write"]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        budget = self.budget_for(scope)
+        if budget is None:
+            await self.app(scope, receive, send)
+            return
+
+        if scope["path"] == self.login_path and scope["method"] == "POST":
+            # behind a proxy this is the forwarded address, set by uvicorn's --proxy-headers
+            client = scope.get("client")
+            retry_after = self.login_limiter.take(client[0] if client else "unknown")
+            if retry_after:
+                await _reject(send, 429, "Too many login attempts", retry_after)
+                return
+
+        if not await budget.acquire():
+            await _reject(
+                send, 503, "Server is busy, please retry shortly", budget.queue_timeout
+            )
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            budget.release()
@@ -0,0 +1,68 @@
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+import orjson
+
+"""
+Request body limit for multipart forms (the image uploads).
+
+Starlette parses a multipart form before the endpoint runs, spooling every file part to a temporary
+file, so a size check while the endpoint copies the upload comes after the whole body was received
+and written to disk once already. This middleware answers `413` before any of that: right away when
+Content-Length announces too big a body, and as soon as a body without one (chunked) goes over.
+"""
+
+
+class BodyTooLarge(HTTPException):
+    def __init__(self, max_body_bytes: int):
+        super().__init__(
+            status_code=413,
+            detail=f"Request body must not be bigger than {max_body_bytes} bytes",
+        )
+
+
+class BodyLimitMiddleware:
+    """
+    Pure ASGI middleware capping the body of every `multipart/form-data` request.
+    """
+
+    def __init__(self, app, max_body_bytes: int):
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if not headers.get("content-type", "").startswith("multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > self.max_body_bytes:
+            error = BodyTooLarge(self.max_body_bytes)
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": error.status_code,
+                    "headers": [(b"content-type", b"application/json")],
+                }
+            )
+            await send(
+                {"type": "http.response.body", "body": orjson.dumps({"detail": error.detail})}
+            )
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                # raised inside the form parsing, FastAPI passes HTTPExceptions through as they are
+                if received > self.max_body_bytes:
+                    raise BodyTooLarge(self.max_body_bytes)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,55 @@
+from app.metrics.registry import MetricsRegistry
+import time
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency and status per route template (`/recipes/{id}`, never
+    the raw path, so the number of series stays bounded), and in-flight requests per method.
+    The template is read from the scope once the router has matched it, nothing is matched twice.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    @staticmethod
+    def route_template(scope, root_path: str) -> str:
+        # FastAPI leaves the matched route in the scope
+        route = scope.get("route")
+        if route is not None:
+            return route.path
+        # mounted apps (the static files) only extend the root path
+        mounted = scope.get("root_path", "")
+        if mounted != root_path:
+            return mounted[len(root_path) :] + "/{path}"
+        return UNMATCHED_ROUTE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        root_path = scope.get("root_path", "")
+        status = 500
+        self.registry.request_started(method)
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.registry.request_finished(
+                method,
+                self.route_template(scope, root_path),
+                status,
+                time.perf_counter() - start,
+            )
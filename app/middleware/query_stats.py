@@ -0,0 +1,48 @@
+from app.database.query_stats import QueryStats, current_query_stats
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStatsMiddleware:
+    """
+    Pure ASGI middleware giving every request its own `QueryStats`.
+    The totals are reported in a `Server-Timing` header (visible in browser dev tools) and requests
+    issuing more queries than the budget are logged with their route.
+    """
+
+    def __init__(self, app, query_budget: int):
+        self.app = app
+        self.query_budget = query_budget
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                timing = f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries"'
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"server-timing", timing.encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_query_stats.reset(token)
+            if stats.count > self.query_budget:
+                route = scope.get("route")
+                logger.warning(
+                    "%s %s issued %d queries (budget %d) in %.1f ms",
+                    scope["method"],
+                    route.path if route is not None else scope["path"],
+                    stats.count,
+                    self.query_budget,
+                    stats.seconds * 1000,
+                )
@@ -0,0 +1,26 @@
+class StickyPrimaryMiddleware:
+    """
+    Pure ASGI middleware setting the primary sticky cookie on every successful write, so the
+    client's next reads see its own write instead of a replica that has not replicated it yet.
+    """
+
+    READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+    def __init__(self, app, cookie_name: str, max_age: int):
+        self.app = app
+        self.cookie = f"{cookie_name}=1; Max-Age={max_age}; Path=/; HttpOnly; SameSite=Lax"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in self.READ_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"set-cookie", self.cookie.encode("latin-1")),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
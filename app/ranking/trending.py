@@ -0,0 +1,239 @@
+from datetime import timedelta
+from sqlalchemy import select, func
+from app.database.database import AsyncSessionLocal
+from app.database.models.like import Like
+from app.database.models.recipe import Recipe
+from app.config.config import settings
+from app.utils.conditional import as_datetime
+import asyncio
+import heapq
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+"""
+Trending recipes, ranked by exponentially time-decayed like activity.
+
+Every like adds exp(-decay * age) to the score of its recipe, and every recipe starts with the weight
+of one fresh like. Decaying all scores by the same factor never changes their order, so scores are
+kept relative to a fixed epoch instead: a like given at `t` adds exp(decay * (t - epoch)), which never
+changes afterwards. That makes the refresh incremental, only the likes given since the last run
+(the watermark) are read and added.
+
+Unlikes and deleted likes can not be seen incrementally, they are picked up by the periodic full
+rebuild, which also moves the epoch forward so the weights stay small.
+The ranking lives in memory, every worker process keeps its own copy.
+"""
+
+# a new recipe starts with the weight of this many fresh likes, so it gets a chance to be seen
+CREATION_WEIGHT = 1.0
+
+# likes older than this many half-lives weigh less than 0.1% of a fresh one, rebuilds skip them
+HORIZON_HALF_LIVES = 10
+
+# rows stamped just before the cutoff may belong to transactions that have not committed yet,
+# so the watermark stays this far behind the database clock
+COMMIT_LAG_SECONDS = 5.0
+
+# rows read per round trip while streaming scores
+STREAM_BATCH_SIZE = 5000
+
+# julianday() of 1970-01-01, to turn SQLite timestamps into unix seconds
+JULIAN_DAY_OF_UNIX_EPOCH = 2440587.5
+
+
+class TrendingRanking:
+    def __init__(
+        self,
+        enabled: bool,
+        half_life_seconds: float,
+        refresh_interval: float,
+        rebuild_interval: float,
+        max_entries: int,
+    ):
+        self.enabled = enabled
+        self.half_life_seconds = half_life_seconds
+        self.decay = math.log(2) / half_life_seconds
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self.max_entries = max_entries
+        self.scores: dict[int, float] = {}
+        self.ranking: list[tuple[int, float]] = []
+        self.epoch = 0.0
+        # database time up to which likes have been counted, None until the first rebuild
+        self.watermark = None
+        self.last_rebuild = 0.0
+        self.rebuilds = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.counted_likes = 0
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    @property
+    def ready(self) -> bool:
+        return self.watermark is not None
+
+    async def _cutoff(self, session):
+        result = await session.execute(select(func.now()))
+        return as_datetime(result.scalar_one()) - timedelta(seconds=COMMIT_LAG_SECONDS)
+
+    def _weight(self, dialect: str, column, epoch: float):
+        """
+        SQL expression of exp(decay * (column - epoch)), the weight of something stamped `column`.
+        SQLite needs its math functions for exp (built in since 3.35 with Python's own builds).
+        """
+        if dialect == "sqlite":
+            seconds = (func.julianday(column) - JULIAN_DAY_OF_UNIX_EPOCH) * 86400.0
+        else:
+            seconds = func.extract("epoch", column)
+        return func.exp(self.decay * (seconds - epoch))
+
+    async def _accumulate(self, session, epoch: float, after, until) -> dict[int, float]:
+        """
+        Sum the weights of the likes given and the recipes created in (after, until].
+        Likes are summed per recipe by the database, so only one row per liked recipe comes back
+        however many likes there are.
+        """
+        dialect = session.bind.dialect.name
+        scores: dict[int, float] = {}
+        likes = await session.stream(
+            select(
+                Like.recipe_id,
+                func.sum(self._weight(dialect, Like.created_at, epoch)),
+                func.count(),
+            )
+            .where(Like.created_at > after, Like.created_at <= until)
+            .group_by(Like.recipe_id)
+            .execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        count = 0
+        async for recipe_id, weight, likes_count in likes:
+            scores[recipe_id] = float(weight)
+            count += likes_count
+        recipes = await session.stream(
+            select(Recipe.id, self._weight(dialect, Recipe.created_at, epoch))
+            .where(Recipe.created_at > after, Recipe.created_at <= until)
+            .execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        async for recipe_id, weight in recipes:
+            scores[recipe_id] = scores.get(recipe_id, 0.0) + CREATION_WEIGHT * float(weight)
+        self.counted_likes += count
+        return scores
+
+    def _rank(self) -> None:
+        self.ranking = heapq.nlargest(
+            self.max_entries, self.scores.items(), key=lambda entry: entry[1]
+        )
+
+    async def _rebuild(self) -> None:
+        async with AsyncSessionLocal() as session:
+            cutoff = await self._cutoff(session)
+            # moving the epoch to now keeps every weight at or below 1
+            epoch = cutoff.timestamp()
+            since = cutoff - timedelta(
+                seconds=self.half_life_seconds * HORIZON_HALF_LIVES
+            )
+            scores = await self._accumulate(session, epoch, since, cutoff)
+        self.scores, self.epoch, self.watermark = scores, epoch, cutoff
+        self.last_rebuild = time.monotonic()
+        self.rebuilds += 1
+        self._rank()
+
+    async def rebuild(self) -> None:
+        """
+        Recompute every score from the likes within the horizon.
+        """
+        async with self._lock:
+            await self._rebuild()
+
+    async def refresh(self) -> None:
+        """
+        Add the likes given since the last run, or rebuild when that is due (or never happened).
+        A failed refresh leaves the scores and the watermark untouched, so nothing is counted twice.
+        """
+        async with self._lock:
+            if (
+                not self.ready
+                or time.monotonic() - self.last_rebuild >= self.rebuild_interval
+            ):
+                await self._rebuild()
+                return
+            async with AsyncSessionLocal() as session:
+                cutoff = await self._cutoff(session)
+                if cutoff <= self.watermark:
+                    return
+                delta = await self._accumulate(
+                    session, self.epoch, self.watermark, cutoff
+                )
+            for recipe_id, value in delta.items():
+                self.scores[recipe_id] = self.scores.get(recipe_id, 0.0) + value
+            self.watermark = cutoff
+            self.refreshes += 1
+            self._rank()
+
+    async def ensure_ready(self) -> None:
+        # a request arriving before the background job's first run builds the ranking itself
+        if not self.ready:
+            async with self._lock:
+                if not self.ready:
+                    await self._rebuild()
+
+    def discard(self, recipe_id: int) -> None:
+        # deleted recipes leave the ranking right away instead of at the next rebuild
+        if self.scores.pop(recipe_id, None) is not None:
+            self.ranking = [entry for entry in self.ranking if entry[0] != recipe_id]
+
+    def page(self, limit: int, offset: int) -> list[tuple[int, float]]:
+        """
+        Return `(recipe_id, score)` of a page of the ranking, scores decayed to the current time
+        (a score of 1.0 is worth one like given right now).
+        """
+        scale = math.exp(-self.decay * (time.time() - self.epoch))
+        return [
+            (recipe_id, score * scale)
+            for recipe_id, score in self.ranking[offset : offset + limit]
+        ]
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.refresh_errors += 1
+                logger.warning("Issue with refreshing the trending ranking: %s", e)
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "scored_recipes": len(self.scores),
+            "ranked_recipes": len(self.ranking),
+            "rebuilds": self.rebuilds,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "counted_likes": self.counted_likes,
+        }
+
+
+trending = TrendingRanking(
+    enabled=settings.trending_enabled,
+    half_life_seconds=settings.trending_half_life_hours * 3600,
+    refresh_interval=settings.trending_refresh_interval_seconds,
+    rebuild_interval=settings.trending_rebuild_interval_seconds,
+    max_entries=settings.trending_max_entries,
+)
@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Response
+from app.metrics.registry import metrics_registry
+
+router = APIRouter(tags=["metrics"])
+
+
+# scrape endpoint for Prometheus
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(
+        content=metrics_registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
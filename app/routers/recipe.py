@@ -1,5 +1,6 @@
 from fastapi import (
     FastAPI,
+    Request,
     Response,
     status,
     staticfiles,
@@ -9,64 +10,475 @@ from fastapi import (
     UploadFile,
     File,
     Form,
+    Query,
 )
 from app.database.models.recipe import Recipe
 from app.database.models.like import Like
-from app.database.database import get_db
+from app.database.database import get_db, get_read_db, is_primary
 from sqlalchemy.ext.asyncio import AsyncSession  # async creation of DB session
 from sqlalchemy.future import select
-from sqlalchemy import or_, desc
+from sqlalchemy import desc, tuple_, literal, update, delete, insert, func, Integer
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from app.schemas import recipe_schemas
 from app.auth import oauth2
-import uuid, os, shutil
+from app.cache.recipe_cache import recipe_cache
+from app.cache.single_flight import single_flight
+from app.database.like_buffer import like_buffer
+from app.search import recipe_search, ingredient_index
+from app.ranking.trending import trending
+from app.utils import pagination, conditional
+from app.media import uploads, derivatives
+from app.config.config import settings
+from app.catalog import export
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+import orjson
 
 
 router = APIRouter(prefix="/recipes", tags=["recipes"])
 
 
+# columns the listing can be ordered by, the id breaks ties so every row has a unique position
+ORDER_COLUMNS = {"created_at": Recipe.created_at, "likes": Recipe.likes}
+
+# the columns of `Recipe_Out`, in its field order
+RECIPE_OUT_COLUMNS = [
+    Recipe.id,
+    Recipe.title,
+    Recipe.ingredients,
+    Recipe.image_path,
+    Recipe.likes,
+    Recipe.created_at,
+    Recipe.description,
+    Recipe.owner_id,
+    Recipe.version,
+    Recipe.updated_at,
+]
+
+# just enough of every row to tell whether a page changed
+VERSION_COLUMNS = [Recipe.id, Recipe.version, Recipe.updated_at]
+
+# most recipes a single batch fetch or bulk create may ask for
+MAX_BATCH_SIZE = 100
+
+
+def _sort_expression(order_by: str, dialect: str):
+    """
+    The expression a listing is ordered by and its cursor compared against.
+    SQLite keeps timestamps as text in whatever format they were written ('... HH:MM:SS' from
+    CURRENT_TIMESTAMP, '... HH:MM:SS.ffffff' from bound datetimes), and text comparison puts
+    '10:00:00' before '10:00:00.000000'. Ordering and comparing by julianday makes both numbers.
+    """
+    column = ORDER_COLUMNS[order_by]
+    if dialect == "sqlite" and order_by == "created_at":
+        return func.julianday(column)
+    return column
+
+
+def _list_query(
+    columns,
+    dialect: str,
+    limit: int,
+    offset: int,
+    order_by: str,
+    search: str | None,
+    cursor: str | None,
+    ingredient_filter=None,
+):
+    """
+    Build the recipe listing query selecting `columns`, with search, ingredient filter, ordering and
+    pagination applied.
+
+    Raises:
+    - **HTTPException 400** if the ordering or the cursor is invalid.
+    """
+    if order_by not in ORDER_COLUMNS and order_by != "relevance":
+        raise HTTPException(
+            status_code=400,
+            detail="order_by must be one of created_at, likes or relevance",
+        )
+
+    query = select(*columns)
+    relevance = None
+
+    if search:
+        query, relevance = recipe_search.apply_search(query, search, dialect)
+    query = ingredient_index.apply_filter(query, ingredient_filter)
+
+    if order_by == "relevance":
+        if cursor:
+            raise HTTPException(
+                status_code=400,
+                detail="Cursor pagination is not available when ordering by relevance",
+            )
+        if relevance is not None:
+            query = query.order_by(desc(relevance), desc(Recipe.id))
+        else:
+            query = query.order_by(desc(Recipe.created_at), desc(Recipe.id))
+        query = query.offset(offset)
+    else:
+        sort_column = _sort_expression(order_by, dialect)
+        if cursor:
+            try:
+                last_key, last_id = pagination.decode_cursor(cursor, order_by)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            if dialect == "sqlite" and order_by == "created_at":
+                last_key = func.julianday(
+                    literal(last_key, type_=Recipe.created_at.type)
+                )
+            # rows inserted after the first page sort before the cursor, so they never shift the next pages
+            query = query.where(
+                tuple_(sort_column, Recipe.id) < tuple_(last_key, last_id)
+            )
+        else:
+            query = query.offset(offset)
+        query = query.order_by(desc(sort_column), desc(Recipe.id))
+    return query.limit(limit)
+
+
+def _serialize_row(row) -> dict:
+    """
+    Turn a row of `RECIPE_OUT_COLUMNS` into the `Recipe_Out` payload without going through pydantic.
+    """
+    recipe = dict(row)
+    recipe["image_variants"] = derivatives.variant_urls(recipe["image_path"])
+    if like_buffer.enabled:
+        recipe["likes"] += like_buffer.pending_delta(recipe["id"])
+    return recipe
+
+
+def _likes_delta(id: int) -> int:
+    return like_buffer.pending_delta(id) if like_buffer.enabled else 0
+
+
+def _page_validators(params, rows):
+    """
+    Return the ETag and Last-Modified of a page from its rows (`VERSION_COLUMNS` at least).
+    """
+    etag = conditional.list_etag(
+        params, ((row["id"], row["version"], _likes_delta(row["id"])) for row in rows)
+    )
+    last_modified = max((row["updated_at"] for row in rows), default=None)
+    return etag, last_modified
+
+
+def _validator_headers(etag: str, last_modified) -> dict:
+    # authenticated representations carry liked_by_me, so they differ per Authorization header
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Authorization"}
+    if last_modified is not None:
+        headers["Last-Modified"] = conditional.http_date(last_modified)
+    return headers
+
+
+async def _liked_recipe_ids(db: AsyncSession, current_user, ids) -> set[int]:
+    """
+    Return which of `ids` the current user liked, with a single query for the whole page.
+    """
+    if current_user is None or not ids:
+        return set()
+    result = await db.execute(
+        select(Like.recipe_id).where(
+            Like.user_id == current_user.id, Like.recipe_id.in_(ids)
+        )
+    )
+    return set(result.scalars())
+
+
+async def _with_liked_flags(db: AsyncSession, current_user, recipes: list[dict]):
+    """
+    Add `liked_by_me` to serialized recipes when the request is authenticated.
+    Returns copies, cached payloads are never modified in place.
+    """
+    if current_user is None:
+        return recipes
+    liked = await _liked_recipe_ids(db, current_user, [r["id"] for r in recipes])
+    return [{**recipe, "liked_by_me": recipe["id"] in liked} for recipe in recipes]
+
+
+async def _recipes_changed(id: int | None = None) -> None:
+    """
+    Call after every committed write to recipes (or their likes): drops the cached payload of the
+    recipe and detaches running read flights, which may have read the rows before the commit.
+    """
+    if id is not None:
+        await recipe_cache.invalidate(id)
+    single_flight.forget_all()
+
+
+def _json_response(content, headers: dict | None = None) -> Response:
+    # orjson encodes straight to bytes (datetimes included), skipping response_model validation
+    return Response(
+        content=orjson.dumps(content), media_type="application/json", headers=headers
+    )
+
+
 # get all recipes or get recipes with limit and offset. Limit is 100 by default
 @router.get(
     "/", status_code=status.HTTP_200_OK, response_model=list[recipe_schemas.Recipe_Out]
 )
 async def get_all_recipes(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     limit: int = 100,
     offset: int = 0,
     order_by: str = "created_at",
     search: str | None = None,  # New search query parameter
+    cursor: str | None = None,
+    with_ingredients: list[str] | None = Query(None),
+    any_ingredients: list[str] | None = Query(None),
+    without_ingredients: list[str] | None = Query(None),
+    current_user=Depends(oauth2.get_optional_current_user),
 ):
     """
     Get all recipes with optional search.
 
     - **limit**: Max number of recipes to return (default: 100)
     - **offset**: How many recipes to skip (for pagination)
-    - **order_by**: Field to order by (`created_at` or `likes`)
-    - **search**: Optional search term to filter recipes by title, description, or ingredients.
+    - **order_by**: Field to order by (`created_at`, `likes` or `relevance`)
+    - **search**: Optional search terms to filter recipes by title, description, or ingredients.
+      Every term has to match. `relevance` ranks title matches above ingredients above description
+      and falls back to `created_at` when there is no search.
+    - **cursor**: Opaque cursor from the `X-Next-Cursor` header of the previous page.
+      Replaces `offset` and keeps the cost of every page constant, however deep the client scrolls.
+      Not available with `order_by=relevance`.
+    - **with_ingredients**: Only recipes containing all of these ingredients (`egg,milk`).
+    - **any_ingredients**: Only recipes containing at least one of these ingredients.
+    - **without_ingredients**: Only recipes containing none of these ingredients.
+      Ingredients match whole words, singular or plural ("eggs" finds "egg", "oil" never "boil"),
+      at most 10 per filter. They can be combined with each other and with `search`.
+
+    Whenever a page is full and ordered by `created_at` or `likes`, the `X-Next-Cursor` response
+    header holds the cursor for the following page.
+
+    The page is read as plain rows of the `Recipe_Out` columns (no ORM objects) and encoded
+    directly to JSON bytes.
+
+    Responses carry an `ETag` derived from the query and the id and version of every recipe on the
+    page. A request with a matching `If-None-Match` gets a `304 Not Modified`, checked with a query
+    that only reads the ids and versions of the page.
+
+    Authenticated requests (optional bearer token) also get `liked_by_me` on every recipe, looked
+    up with one query for the whole page.
     """
+    ingredient_filter = ingredient_index.parse_filter(
+        with_ingredients, any_ingredients, without_ingredients
+    )
+    list_args = (
+        db.bind.dialect.name,
+        limit,
+        offset,
+        order_by,
+        search,
+        cursor,
+        ingredient_filter,
+    )
+    user_id = current_user.id if current_user is not None else None
+    params = (limit, offset, order_by, search, cursor, ingredient_filter, user_id)
+
+    async def load_versions():
+        result = await db.execute(_list_query(VERSION_COLUMNS, *list_args))
+        return result.mappings().all()
+
+    # identical concurrent requests share one query and its serialized page
+    async def load_page():
+        result = await db.execute(_list_query(RECIPE_OUT_COLUMNS, *list_args))
+        rows = result.mappings().all()
+        return rows, [_serialize_row(row) for row in rows]
+
+    if "if-none-match" in request.headers:
+        versions = await single_flight.do(
+            ("list-versions", is_primary(db), list_args), load_versions
+        )
+        etag, last_modified = _page_validators(params, versions)
+        if conditional.is_not_modified(request.headers, etag):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers=_validator_headers(etag, last_modified),
+            )
 
-    query = select(Recipe)
+    # readers of the primary never join a flight running on a (possibly lagging) replica
+    rows, recipes = await single_flight.do(
+        ("list", is_primary(db), list_args), load_page
+    )
 
-    if search:
-        query = query.where(
-            or_(
-                Recipe.title.ilike(f"%{search}%"),
-                Recipe.description.ilike(f"%{search}%"),
-                Recipe.ingredients.ilike(f"%{search}%"),
-            )
+    headers = _validator_headers(*_page_validators(params, rows))
+    if order_by in ORDER_COLUMNS and limit > 0 and len(rows) == limit:
+        # the stored sort key, without any pending like delta
+        last = rows[-1]
+        headers["X-Next-Cursor"] = pagination.encode_cursor(
+            order_by, last[order_by], last["id"]
+        )
+    recipes = await _with_liked_flags(db, current_user, recipes)
+    return _json_response(recipes, headers)
+
+
+def _parse_batch_ids(ids: list[str]) -> list[int]:
+    """
+    Parse `ids=1,2&ids=3` style query values into unique ids, in the order first requested.
+
+    Raises:
+    - **HTTPException 400** if an id is not an integer or there are too many ids.
+    """
+    unique = {}
+    for value in ids:
+        for part in value.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            try:
+                unique[int(part)] = None
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid recipe id: {part}")
+    if len(unique) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_SIZE} recipes can be fetched at once",
+        )
+    return list(unique)
+
+
+# get many recipes by id (declared before /{id}, otherwise "batch" would be taken for an id)
+@router.get(
+    "/batch",
+    status_code=status.HTTP_200_OK,
+    response_model=list[recipe_schemas.Recipe_Out],
+)
+async def get_recipes_batch(
+    ids: list[str] = Query(...),
+    db: AsyncSession = Depends(get_read_db),
+    current_user=Depends(oauth2.get_optional_current_user),
+):
+    """
+    Get many recipes by their IDs at once.
+
+    Parameters:
+    - **ids**: Comma separated ids (`?ids=3,1,2`), repeated ids (`?ids=3&ids=1`) or both.
+      Duplicates are ignored, at most 100 different ids per request.
+    - **db**: SQLAlchemy asynchronous session (injected via dependency).
+    - **current_user**: The user of the optional bearer token, adds `liked_by_me` to the recipes.
+
+    Returns:
+    - The recipes in the order they were requested. Ids that do not exist are left out.
+      Recipes in the detail cache are served from it, all the others are read with a single query.
+
+    Raises:
+    - **HTTPException 400** if an id is not an integer or more than 100 ids are requested.
+    """
+    recipes = await _load_recipes(db, _parse_batch_ids(ids))
+    return _json_response(await _with_liked_flags(db, current_user, recipes))
+
+
+# trending recipes (declared before /{id}, otherwise "trending" would be taken for an id)
+@router.get(
+    "/trending",
+    status_code=status.HTTP_200_OK,
+    response_model=list[recipe_schemas.Recipe_Out],
+)
+async def get_trending_recipes(
+    limit: int = 20,
+    offset: int = 0,
+    db: AsyncSession = Depends(get_read_db),
+    current_user=Depends(oauth2.get_optional_current_user),
+):
+    """
+    Get the recipes trending right now.
+
+    Recipes are ranked by their likes, each like weighing less the older it is (it loses half of
+    its weight every `TRENDING_HALF_LIFE_HOURS`), so old favourites make room for new ones.
+    The ranking is precomputed in the background and refreshed every few seconds with the newest
+    likes, a page only reads its own recipes.
+
+    Parameters:
+    - **limit**: Max number of recipes to return (default: 20, at most 100).
+    - **offset**: How many recipes of the ranking to skip.
+    - **db**: SQLAlchemy asynchronous session (injected via dependency).
+    - **current_user**: The user of the optional bearer token, adds `liked_by_me` to the recipes.
+
+    Returns:
+    - The recipes of the page, most trending first.
+
+    Raises:
+    - **HTTPException 400** if `limit` or `offset` is out of range.
+    - **HTTPException 404** if the trending ranking is disabled.
+    """
+    if not trending.enabled:
+        raise HTTPException(status_code=404, detail="Trending recipes are disabled")
+    if not 0 < limit <= MAX_BATCH_SIZE or offset < 0:
+        raise HTTPException(
+            status_code=400,
+            detail=f"limit must be between 1 and {MAX_BATCH_SIZE}, offset at least 0",
         )
+    await trending.ensure_ready()
+    ids = [recipe_id for recipe_id, _ in trending.page(limit, offset)]
+    recipes = await _load_recipes(db, ids)
+    return _json_response(await _with_liked_flags(db, current_user, recipes))
+
+
+# export the whole catalog (declared before /{id}, otherwise "export" would be taken for an id)
+@router.get("/export", status_code=status.HTTP_200_OK)
+async def export_recipes(
+    request: Request,
+    owner_id: int | None = None,
+    created_after: datetime | None = None,
+    after_id: int | None = None,
+):
+    """
+    Stream every recipe as NDJSON (`application/x-ndjson`, one `Recipe_Out` object per line),
+    ordered by id.
 
-    query = query.order_by(desc(order_by)).limit(limit).offset(offset)
+    The recipes are read through a server-side cursor in fixed-size batches and written out as they
+    arrive, so neither side ever holds the whole catalog. Clients sending `Accept-Encoding: gzip`
+    get the stream gzip compressed on the fly.
 
-    result = await db.execute(query)
-    recipes = result.scalars().all()
-    return recipes
+    Parameters:
+    - **owner_id**: Only export the recipes of this user.
+    - **created_after**: Only export recipes created after this time (ISO 8601).
+    - **after_id**: Resume a broken export after the recipe with this id (the last complete line).
+
+    Returns:
+    - The NDJSON stream.
+    """
+    chunks = export.iter_ndjson(export.export_query(owner_id, created_after, after_id))
+    headers = {"Vary": "Accept-Encoding"}
+    if export.accepts_gzip(request.headers.get("accept-encoding", "")):
+        chunks = export.gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type="application/x-ndjson", headers=headers)
+
+
+async def _load_recipes(db: AsyncSession, ids: list[int]) -> list[dict]:
+    """
+    Return the serialized recipes of `ids` in that order, leaving out ids that do not exist.
+    Recipes in the detail cache are served from it, all the others are read with a single query.
+    """
+    found = {}
+    for id in ids:
+        recipe = await recipe_cache.get(id)
+        if recipe is not None:
+            found[id] = _with_pending_likes(recipe)
+
+    missing = [id for id in ids if id not in found]
+    if missing:
+        result = await db.execute(
+            select(*RECIPE_OUT_COLUMNS).where(Recipe.id.in_(missing))
+        )
+        for row in result.mappings():
+            found[row["id"]] = _serialize_row(row)
+    return [found[id] for id in ids if id in found]
 
 
 # get recipe by id
 @router.get(
     "/{id}", status_code=status.HTTP_200_OK, response_model=recipe_schemas.Recipe_Out
 )
-async def get_recipe_by_id(id: int, db: AsyncSession = Depends(get_db)):
+async def get_recipe_by_id(
+    id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    current_user=Depends(oauth2.get_optional_current_user),
+):
     """
     Get a recipe by its ID.
 
@@ -76,18 +488,59 @@ async def get_recipe_by_id(id: int, db: AsyncSession = Depends(get_db)):
     Parameters:
     - **id**: The unique identifier of the recipe to retrieve.
     - **db**: SQLAlchemy asynchronous session (injected via dependency).
+    - **current_user**: The user of the optional bearer token, adds `liked_by_me` to the recipe.
 
     Returns:
-    - The recipe as a `Recipe_Out` schema.
+    - The recipe as a `Recipe_Out` schema, with `ETag` and `Last-Modified` headers.
+    - **304 Not Modified** when `If-None-Match` / `If-Modified-Since` match the current version.
+      A cached recipe answers without touching the database, otherwise only the version is read.
 
     Raises:
     - **HTTPException 404** if the recipe with the specified ID does not exist.
     """
-    result = await db.execute(select(Recipe).where(Recipe.id == id))
-    recipe = result.scalar_one_or_none()
+    user_id = current_user.id if current_user is not None else None
+    if conditional.is_conditional(request.headers):
+        validators = await recipe_cache.get(id)
+        if validators is None:
+            result = await db.execute(
+                select(Recipe.version, Recipe.updated_at).where(Recipe.id == id)
+            )
+            validators = result.mappings().one_or_none()
+        if validators is not None:
+            etag = conditional.recipe_etag(
+                id, validators["version"], _likes_delta(id), user_id
+            )
+            if conditional.is_not_modified(
+                request.headers, etag, validators["updated_at"]
+            ):
+                return Response(
+                    status_code=status.HTTP_304_NOT_MODIFIED,
+                    headers=_validator_headers(etag, validators["updated_at"]),
+                )
+
+    async def load_recipe():
+        result = await db.execute(select(Recipe).where(Recipe.id == id))
+        recipe = result.scalar_one_or_none()
+        if not recipe:
+            return None
+        # the cached payload is shared by every user, liked_by_me is added per request
+        return recipe_schemas.Recipe_Out.model_validate(
+            recipe, from_attributes=True
+        ).model_dump(mode="json", exclude={"liked_by_me"})
+
+    # concurrent misses for the same recipe share one load
+    # a replica may still return the recipe as it was before a recent write, which is served
+    # but not cached
+    recipe = await recipe_cache.get_or_load(
+        id,
+        lambda: single_flight.do(("recipe", is_primary(db), id), load_recipe),
+        settle_seconds=0 if is_primary(db) else settings.primary_sticky_seconds,
+    )
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
-    return recipe
+    etag = conditional.recipe_etag(id, recipe["version"], _likes_delta(id), user_id)
+    [recipe] = await _with_liked_flags(db, current_user, [_with_pending_likes(recipe)])
+    return _json_response(recipe, _validator_headers(etag, recipe["updated_at"]))
 
 
 # create recipe
@@ -113,14 +566,14 @@ async def create_recipe(
     Creates a new recipe in the database.
 
     This endpoint handles multipart/form-data requests to allow image uploads along with other
-    form fields. It saves the image to the local filesystem (under `app/static/images/`) and stores
-    a public-facing path to it in the database.
+    form fields. It streams the image to the local filesystem (under `app/static/images/`), named
+    after the hash of its content, and stores a public-facing path to it in the database.
 
     Parameters:
     - **title**: The title of the recipe (required).
     - **ingredients**: A string describing the ingredients used (required).
     - **description**: Detailed steps or notes for the recipe (required).
-    - **image**: Optional image file upload (JPG/PNG/etc.).
+    - **image**: Optional image file upload (JPEG, PNG, GIF or WebP).
     - **db**: SQLAlchemy asynchronous session (injected via dependency).
     - **current_user**: The currently authenticated user (injected via dependency).
 
@@ -129,6 +582,8 @@ async def create_recipe(
 
     Raises:
     - **HTTPException 404** if required fields are missing.
+    - **HTTPException 413** if the image is too big.
+    - **HTTPException 415** if the upload is not a supported image.
     """
     if not title or not ingredients or not description:
         raise HTTPException(
@@ -136,20 +591,11 @@ async def create_recipe(
             detail="Title, description and ingredients fields are mandatory!",
         )
     # Handle optional image upload
+    # Relative path to be saved in the database (publicly accessible since static is mounted)
     image_path = None
     if image:
-        extension = image.filename.split(".")[-1]
-        unique_name = f"{uuid.uuid4()}.{extension}"
-        upload_dir = "app/static/images"
-        os.makedirs(upload_dir, exist_ok=True)
-        file_location = os.path.join(upload_dir, unique_name)
-
-        # Save uploaded file to the specified location
-        with open(file_location, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-
-        # Relative path to be saved in the database (publicly accessible if static is mounted)
-        image_path = f"/static/images/{unique_name}"  # Or a public URL
+        image_path = await uploads.save_image(image)
+        await derivatives.create_variants(image_path)
 
     new_recipe = Recipe(
         title=title,
@@ -159,11 +605,69 @@ async def create_recipe(
         owner_id=current_user.id,
     )
     db.add(new_recipe)
+    # the id is needed for the ingredient index, both are committed together
+    await db.flush()
+    await ingredient_index.index_recipes(db, [(new_recipe.id, ingredients)])
     await db.commit()
+    await _recipes_changed()
     await db.refresh(new_recipe)
     return new_recipe
 
 
+# create many recipes in one transaction
+@router.post(
+    "/bulk",
+    status_code=status.HTTP_201_CREATED,
+    response_model=list[recipe_schemas.Recipe_Out],
+)
+async def create_recipes_bulk(
+    recipes: list[recipe_schemas.Recipe_Create],
+    db: AsyncSession = Depends(get_db),
+    current_user: int = Depends(oauth2.get_current_user),
+):
+    """
+    Create many recipes (without images) in one transaction.
+
+    Parameters:
+    - **recipes**: A JSON list of recipes with `title`, `ingredients` and `description`,
+      at most 100 per request.
+    - **db**: SQLAlchemy asynchronous session (injected via dependency).
+    - **current_user**: The currently authenticated user (injected via dependency).
+
+    Returns:
+    - The created recipes as `Recipe_Out` schemas, in the order they were sent.
+      They are written with a single multi-row insert, so either all of them are created or none.
+
+    Raises:
+    - **HTTPException 400** if the list is empty, too long or a recipe has an empty field.
+    """
+    if not recipes or len(recipes) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Send between 1 and {MAX_BATCH_SIZE} recipes",
+        )
+    for index, recipe in enumerate(recipes):
+        if not recipe.title or not recipe.ingredients or not recipe.description:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Recipe {index}: title, description and ingredients "
+                "fields are mandatory!",
+            )
+
+    # sort_by_parameter_order keeps the returned rows in the order of the request
+    result = await db.execute(
+        insert(Recipe).returning(*RECIPE_OUT_COLUMNS, sort_by_parameter_order=True),
+        [{**recipe.model_dump(), "owner_id": current_user.id} for recipe in recipes],
+    )
+    rows = [dict(row) for row in result.mappings()]
+    await ingredient_index.index_recipes(
+        db, [(row["id"], row["ingredients"]) for row in rows]
+    )
+    await db.commit()
+    await _recipes_changed()
+    return rows
+
+
 # Update recipe
 @router.put(
     "/{id}",
@@ -189,7 +693,7 @@ async def update_recipe(
     - **title**: The new title of the recipe (required).
     - **ingredients**: The new ingredients used in the recipe (required).
     - **description**: The updated description of the recipe (required).
-    - **image**: Optional new image file upload (JPG/PNG/etc.).
+    - **image**: Optional new image file upload (JPEG, PNG, GIF or WebP).
     - **db**: SQLAlchemy asynchronous session (injected via dependency).
     - **current_user**: The currently authenticated user (injected via dependency).
 
@@ -198,6 +702,8 @@ async def update_recipe(
 
     Raises:
     - **HTTPException 404** if the recipe with the specified ID does not exist.
+    - **HTTPException 413** if the image is too big.
+    - **HTTPException 415** if the upload is not a supported image.
     """
     if not title or not ingredients or not description:
         raise HTTPException(
@@ -215,32 +721,28 @@ async def update_recipe(
         raise HTTPException(
             status_code=403, detail="You do not have permission to update this recipe"
         )
-    print(recipe.owner_id, current_user.id)
+
+    if recipe.ingredients != ingredients:
+        await ingredient_index.reindex_recipes(db, [(id, ingredients)])
 
     # Update fields
     recipe.title = title
     recipe.ingredients = ingredients
     recipe.description = description
+    recipe.version = Recipe.version + 1
 
     # Handle optional image upload
     if image:
-        extension = image.filename.split(".")[-1]
-        unique_name = f"{uuid.uuid4()}.{extension}"
-        upload_dir = "app/static/images"
-        os.makedirs(upload_dir, exist_ok=True)
-        file_location = os.path.join(upload_dir, unique_name)
-
-        # Save uploaded file to the specified location
-        with open(file_location, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-
-        # Relative path to be saved in the database (publicly accessible if static is mounted)
-        recipe.image_path = f"/static/images/{unique_name}"
+        image_path = await uploads.save_image(image)
+        if image_path:
+            await derivatives.create_variants(image_path)
+            recipe.image_path = image_path
 
     await db.commit()
+    await _recipes_changed(id)
+    # one select for the server-side values (version, updated_at), the recipe is already loaded
     await db.refresh(recipe)
-    result = await db.execute(select(Recipe).where(Recipe.id == id))
-    return result.scalars().one_or_none()
+    return recipe
 
 
 # Delete recipe
@@ -278,8 +780,102 @@ async def delete_recipe(
             status_code=403, detail="You do not have permission to delete this recipe"
         )
 
+    await ingredient_index.remove_recipes(db, [id])
     await db.delete(recipe)
     await db.commit()
+    await _recipes_changed(id)
+    trending.discard(id)
+
+
+# Like and unlike run as one atomic statement on Postgres (a data-modifying CTE) and as two
+# statements in one transaction elsewhere. The primary key on likes makes the insert/delete the
+# single point of truth, and the counter is moved server-side, so concurrent requests never
+# lose or double count a like. The recipe is only read again on the error paths.
+# With the like buffer enabled the counter update is replaced by a plain read of the recipe,
+# and the delta goes to the buffer instead.
+def _like_statement(dialect: str, user_id: int, recipe_id: int):
+    insert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+    return (
+        insert(Like)
+        .from_select(
+            ["user_id", "recipe_id"],
+            select(literal(user_id, Integer), Recipe.id).where(
+                Recipe.id == recipe_id, Recipe.owner_id != user_id
+            ),
+        )
+        .on_conflict_do_nothing()
+        .returning(Like.recipe_id)
+    )
+
+
+def _unlike_statement(user_id: int, recipe_id: int):
+    return (
+        delete(Like)
+        .where(Like.user_id == user_id, Like.recipe_id == recipe_id)
+        .returning(Like.recipe_id)
+    )
+
+
+async def _apply_like_change(db: AsyncSession, change_like, delta: int):
+    """
+    Run the like insert/delete and, only if it touched a row, the counter update.
+    Returns the updated recipe row as a dict, or None when the like did not change.
+    """
+    if like_buffer.enabled:
+        read_recipe = select(*Recipe.__table__.columns)
+    else:
+        read_recipe = (
+            update(Recipe)
+            .values(
+                likes=Recipe.likes + delta,
+                version=Recipe.version + 1,
+                updated_at=func.now(),
+            )
+            .returning(*Recipe.__table__.columns)
+            .execution_options(synchronize_session=False)
+        )
+    if db.bind.dialect.name == "postgresql":
+        changed = change_like.cte("changed_like")
+        result = await db.execute(
+            read_recipe.add_cte(changed).where(
+                Recipe.id.in_(select(changed.c.recipe_id))
+            )
+        )
+        row = result.mappings().one_or_none()
+    else:
+        result = await db.execute(change_like)
+        changed = result.scalar_one_or_none()
+        row = None
+        if changed is not None:
+            result = await db.execute(read_recipe.where(Recipe.id == changed))
+            row = result.mappings().one_or_none()
+    await db.commit()
+    if row is None:
+        return None
+    if like_buffer.enabled:
+        like_buffer.add(row["id"], delta)
+    return _with_pending_likes(dict(row))
+
+
+def _with_pending_likes(recipe: dict) -> dict:
+    """
+    Add the like delta still waiting in the like buffer to a serialized recipe.
+    Returns a copy when the count changes, cached payloads are never modified in place.
+    """
+    if not like_buffer.enabled:
+        return recipe
+    delta = like_buffer.pending_delta(recipe["id"])
+    if not delta:
+        return recipe
+    return {**recipe, "likes": recipe["likes"] + delta}
+
+
+async def _get_recipe_owner(db: AsyncSession, id: int):
+    result = await db.execute(select(Recipe.owner_id).where(Recipe.id == id))
+    owner_id = result.scalar_one_or_none()
+    if owner_id is None:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    return owner_id
 
 
 # Like recipe
@@ -309,31 +905,22 @@ async def like_recipe(
 
     Raises:
     - **HTTPException 404** if the recipe with the specified ID does not exist.
+    - **HTTPException 403** if the user tries to like their own recipe.
+    - **HTTPException 400** if the user has already liked the recipe.
     """
-    result = await db.execute(select(Recipe).where(Recipe.id == id))
-    recipe = result.scalar_one_or_none()
-
-    result = await db.execute(select(Recipe).where(Recipe.id == id))
-    recipe = result.scalar_one_or_none()
-    if not recipe:
-        raise HTTPException(status_code=404, detail="Recipe not found")
-    if current_user.id == recipe.owner_id:
-        raise HTTPException(status_code=403, detail="You cannot like your own recipe")
-    result_likes = await db.execute(
-        select(Like).where(Like.user_id == current_user.id, Like.recipe_id == id)
+    recipe = await _apply_like_change(
+        db, _like_statement(db.bind.dialect.name, current_user.id, id), 1
     )
-    existing_like = result_likes.scalar_one_or_none()
-    if existing_like:
+    if recipe is None:
+        owner_id = await _get_recipe_owner(db, id)
+        if owner_id == current_user.id:
+            raise HTTPException(
+                status_code=403, detail="You cannot like your own recipe"
+            )
         raise HTTPException(
             status_code=400, detail="You have already liked this recipe"
         )
-    new_like = Like(user_id=current_user.id, recipe_id=id)
-    db.add(new_like)
-    await db.commit()
-    await db.refresh(new_like)
-    recipe.likes += 1  # Increment the like count
-    await db.commit()
-    await db.refresh(recipe)
+    await _recipes_changed(id)
     return recipe
 
 
@@ -359,34 +946,22 @@ async def remove_like_from_recipe(
     - **current_user**: The currently authenticated user (injected via dependency).
 
     Returns:
-    - No content (204) if the unlike operation is successful.
+    - The updated recipe as a `Recipe_Out` schema.
 
     Raises:
     - **HTTPException 404** if the recipe with the specified ID does not exist.
     - **HTTPException 403** if the user does not have permission to unlike the recipe.
+    - **HTTPException 404** if the user has not liked the recipe.
     """
-    result = await db.execute(select(Recipe).where(Recipe.id == id))
-    recipe = result.scalar_one_or_none()
-
-    if not recipe:
-        raise HTTPException(status_code=404, detail="Recipe not found")
-
-    if recipe.owner_id == current_user.id:
-        raise HTTPException(
-            status_code=403, detail="You cannot remove like from your own recipe"
-        )
-
-    result_likes = await db.execute(
-        select(Like).where(Like.user_id == current_user.id, Like.recipe_id == id)
+    recipe = await _apply_like_change(
+        db, _unlike_statement(current_user.id, id), -1
     )
-    existing_like = result_likes.scalar_one_or_none()
-
-    if not existing_like:
+    if recipe is None:
+        owner_id = await _get_recipe_owner(db, id)
+        if owner_id == current_user.id:
+            raise HTTPException(
+                status_code=403, detail="You cannot remove like from your own recipe"
+            )
         raise HTTPException(status_code=404, detail="You have not liked this recipe")
-
-    await db.delete(existing_like)
-    await db.commit()
-
-    recipe.likes -= 1  # Decrement the like count
-    await db.commit()
+    await _recipes_changed(id)
     return recipe
@@ -8,7 +8,7 @@ from fastapi import (
     APIRouter,
 )
 from app.database.models.user import User
-from app.database.database import get_db
+from app.database.database import get_db, get_read_db
 from sqlalchemy.ext.asyncio import AsyncSession  # async creation of DB session
 from sqlalchemy.future import select
 from app.schemas import user_schemas
@@ -26,6 +26,15 @@ router = APIRouter(
 )
 
 
+# returned when the password hashing pool is saturated, clients should back off and retry
+def hashing_busy_exception():
+    return HTTPException(
+        status_code=503,
+        detail="Too many authentication requests in progress, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
 # Register user
 @router.post(
     "/register",
@@ -38,7 +47,7 @@ async def register(
     """
     Register a new user.
 
-    - Hashes the user's password using bcrypt for secure storage.
+    - Hashes the user's password using bcrypt for secure storage, off the event loop.
     - Creates a new user record in the database with the provided email and hashed password.
     - Commits the new user to the database and returns the created user (excluding the password).
 
@@ -51,6 +60,7 @@ async def register(
 
     Raises:
         HTTPException: If the user cannot be created (e.g., due to a database error or duplicate email).
+        HTTPException: 503 if the password hashing pool is saturated.
     """
     query = await db.execute(select(User).where(User.email == user_register.email))
     user = query.scalars().first()
@@ -59,7 +69,10 @@ async def register(
             status_code=404,
             detail=f"User with email {user_register.email} already exists!",
         )
-    hashed_password = password_hash.hash(user_register.password)
+    try:
+        hashed_password = await password_hash.hash_async(user_register.password)
+    except password_hash.PasswordHasherBusy:
+        raise hashing_busy_exception()
     user_register.password = hashed_password
     new_user = User(**user_register.dict())
     db.add(new_user)
@@ -72,7 +85,7 @@ async def register(
 @router.get(
     "/{id}", status_code=status.HTTP_200_OK, response_model=user_schemas.UserOut
 )
-async def get_user_by_id(id: int, db: AsyncSession = Depends(get_db)):
+async def get_user_by_id(id: int, db: AsyncSession = Depends(get_read_db)):
     """
     Retrieve a user by their unique ID.
 
@@ -110,11 +123,19 @@ async def login(
     # need to compare the plain password the current user has written with the hashed password
     # of the user found in the DB with the provided email
     # That is very important, otherwise you get bugs
-    password_is_correct = password_hash.verify_password(
-        user_login.password, user.password
-    )
+    # bcrypt runs in the hashing pool, so other requests keep being served meanwhile
+    try:
+        password_is_correct, new_hash = await password_hash.verify_and_update_async(
+            user_login.password, user.password
+        )
+    except password_hash.PasswordHasherBusy:
+        raise hashing_busy_exception()
     if not password_is_correct:
         raise HTTPException(status_code=404, detail="Invalid credentials!")
+    # the stored hash was made with another cost factor, replace it transparently
+    if new_hash:
+        user.password = new_hash
+        await db.commit()
 
     access_token = oauth2.create_access_token(data={"user_id": user.id})
     return {
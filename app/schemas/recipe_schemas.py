@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr, conint, validator
+from pydantic import BaseModel, EmailStr, conint, validator, computed_field
 from typing import Optional
 from datetime import datetime
+from app.media.derivatives import variant_urls
 
 
 class Recipe_Create(BaseModel):
@@ -18,3 +19,13 @@ class Recipe_Out(BaseModel):
     created_at: datetime
     description: str
     owner_id: int
+    version: int
+    updated_at: datetime
+    # only present for authenticated requests on the read endpoints
+    liked_by_me: Optional[bool] = None
+
+    # urls of the resized WebP versions of the image (thumbnail, card and full)
+    @computed_field
+    @property
+    def image_variants(self) -> Optional[dict[str, str]]:
+        return variant_urls(self.image_path)
@@ -10,3 +10,10 @@ class Token(BaseModel):
 
 class Token_Data(BaseModel):
     id: Optional[int] = None
+    exp: Optional[int] = None
+
+
+# lightweight identity of the authenticated user, handlers only need the id
+class Current_User(BaseModel):
+    id: int
+    email: str
@@ -0,0 +1,54 @@
+from sqlalchemy import select
+from app.database import database
+from app.database.models.like import Like
+from app.database.models.recipe import Recipe
+from app.database.models.recipe_ingredient import RecipeIngredient
+from app.database.models.user import User
+from app.search import ingredient_index
+import argparse
+import asyncio
+
+"""
+Tokenize the ingredients of every existing recipe into the ingredient index.
+
+Usage:
+    python -m app.search.backfill_ingredients [--batch-size N]
+"""
+
+
+async def backfill(batch_size: int) -> int:
+    # creates the recipe_ingredients table when the API has not been started since it was added
+    await database.create_db_and_tables()
+    last_id = 0
+    indexed = 0
+    async with database.AsyncSessionLocal() as db:
+        while True:
+            result = await db.execute(
+                select(Recipe.id, Recipe.ingredients)
+                .where(Recipe.id > last_id)
+                .order_by(Recipe.id)
+                .limit(batch_size)
+            )
+            batch = result.all()
+            if not batch:
+                break
+            # every batch replaces the tokens of its recipes, so the backfill can be run again
+            await ingredient_index.reindex_recipes(db, batch)
+            await db.commit()
+            last_id = batch[-1].id
+            indexed += len(batch)
+            print(f"Indexed {indexed} recipes (up to id {last_id})")
+    await database.engine.dispose()
+    return indexed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill the ingredient index")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    indexed = asyncio.run(backfill(args.batch_size))
+    print(f"Done, {indexed} recipes indexed")
+
+
+if __name__ == "__main__":
+    main()
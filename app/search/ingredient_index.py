@@ -0,0 +1,149 @@
+from fastapi import HTTPException
+from sqlalchemy import select, insert, delete, intersect
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.models.recipe import Recipe
+from app.database.models.recipe_ingredient import RecipeIngredient
+from app.search.recipe_search import TERM_PATTERN
+
+"""
+Inverted index of recipe ingredients.
+
+`Recipe.ingredients` is free text, so it is split into normalized tokens ("2 cups of Tomatoes"
+gives "tomato") stored in `recipe_ingredients`, one row per (token, recipe). Filters then match
+whole tokens through the primary key instead of substrings ("oil" no longer matches "boil").
+The routers keep the index in sync on create, update and delete, existing recipes are indexed with
+`python -m app.search.backfill_ingredients`.
+"""
+
+# quantities, units and filler words that are not ingredients
+STOP_WORDS = frozenset(
+    """
+    a an and or of to the for with without in on at as by into from plus
+    g gr gram grams kg ml l dl cl litre litres liter liters oz lb lbs
+    tsp tbsp teaspoon teaspoons tablespoon tablespoons cup cups pinch dash
+    piece pieces slice slices clove cloves handful large medium small
+    fresh chopped diced sliced minced optional taste some few more less
+    """.split()
+)
+
+# most different ingredients a single filter may list
+MAX_FILTER_TOKENS = 10
+
+
+def normalize_token(word: str) -> str | None:
+    """
+    Normalize one word to its index token, None for numbers, units and filler words.
+    """
+    word = word.lower()
+    # quantities like "2" or "100g"
+    if word[0].isdigit() or len(word) < 2 or word in STOP_WORDS:
+        return None
+    # naive singular, enough to make "eggs" find "egg" and "tomatoes" find "tomato"
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith("oes"):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us")):
+        return word[:-1]
+    return word
+
+
+def tokenize(ingredients: str) -> set[str]:
+    tokens = (normalize_token(word) for word in TERM_PATTERN.findall(ingredients))
+    return {token for token in tokens if token}
+
+
+async def index_recipes(db: AsyncSession, recipes) -> None:
+    """
+    Add the tokens of new recipes, given as `(id, ingredients)` pairs, in one multi-row insert.
+    Runs in the caller's transaction.
+    """
+    rows = [
+        {"recipe_id": id, "token": token}
+        for id, ingredients in recipes
+        for token in tokenize(ingredients)
+    ]
+    if rows:
+        await db.execute(insert(RecipeIngredient), rows)
+
+
+async def remove_recipes(db: AsyncSession, ids) -> None:
+    # explicit, SQLite only honours ON DELETE CASCADE with foreign keys switched on
+    await db.execute(
+        delete(RecipeIngredient).where(RecipeIngredient.recipe_id.in_(list(ids)))
+    )
+
+
+async def reindex_recipes(db: AsyncSession, recipes) -> None:
+    """
+    Replace the tokens of existing recipes, given as `(id, ingredients)` pairs.
+    """
+    recipes = list(recipes)
+    await remove_recipes(db, [id for id, _ in recipes])
+    await index_recipes(db, recipes)
+
+
+def parse_filter(all_of, any_of, none_of):
+    """
+    Turn the comma separated (or repeated) ingredient query parameters into normalized tokens.
+
+    Returns:
+    - `(all_of, any_of, none_of)` as sorted tuples of tokens, or None when there is no filter.
+
+    Raises:
+    - **HTTPException 400** if a filter lists too many ingredients, or none that can be matched
+      (only units and stop words), which would otherwise silently return every recipe.
+    """
+    sets = []
+    for values in (all_of, any_of, none_of):
+        tokens = set()
+        for value in values or []:
+            tokens |= tokenize(value.replace(",", " "))
+        supplied = any(value.replace(",", " ").strip() for value in values or [])
+        if supplied and not tokens:
+            raise HTTPException(
+                status_code=400,
+                detail="Ingredient filter has no ingredient to match, "
+                "units and common words are ignored",
+            )
+        if len(tokens) > MAX_FILTER_TOKENS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {MAX_FILTER_TOKENS} ingredients per filter",
+            )
+        sets.append(tuple(sorted(tokens)))
+    return tuple(sets) if any(sets) else None
+
+
+def apply_filter(query, ingredient_filter):
+    """
+    Restrict a recipe query to the recipes containing all of the first set of tokens, at least one
+    of the second and none of the third. The all-of set is resolved as the intersection of the
+    index ranges of its tokens.
+    """
+    if ingredient_filter is None:
+        return query
+    all_of, any_of, none_of = ingredient_filter
+
+    candidates = [
+        select(RecipeIngredient.recipe_id).where(RecipeIngredient.token == token)
+        for token in all_of
+    ]
+    if any_of:
+        candidates.append(
+            select(RecipeIngredient.recipe_id).where(RecipeIngredient.token.in_(any_of))
+        )
+    if len(candidates) > 1:
+        query = query.where(Recipe.id.in_(intersect(*candidates)))
+    elif candidates:
+        query = query.where(Recipe.id.in_(candidates[0]))
+
+    if none_of:
+        query = query.where(
+            Recipe.id.not_in(
+                select(RecipeIngredient.recipe_id).where(
+                    RecipeIngredient.token.in_(none_of)
+                )
+            )
+        )
+    return query
@@ -0,0 +1,183 @@
+from sqlalchemy import text, func, literal_column, table, column, and_, or_, case
+from sqlalchemy.ext.asyncio import AsyncConnection
+from app.database.models.recipe import Recipe
+import re
+
+"""
+Full-text search over recipes.
+
+Postgres keeps a weighted tsvector in a generated `search_document` column backed by a GIN index,
+SQLite keeps an FTS5 external content table in sync through triggers.
+Both are maintained by the database itself, so create, update and delete (and any bulk writes)
+never need to touch the index by hand.
+Any other dialect falls back to per-term ilike matching with the same weighting.
+"""
+
+# a match in the title counts more than in the ingredients, which counts more than in the description
+TITLE_WEIGHT = 10.0
+INGREDIENTS_WEIGHT = 5.0
+DESCRIPTION_WEIGHT = 1.0
+
+# guard against huge queries turning into huge tsquery / MATCH expressions
+MAX_TERMS = 8
+
+# only letters and digits end up in the generated query, so no escaping is needed
+TERM_PATTERN = re.compile(r"[^\W_]+", re.UNICODE)
+
+# the stop words Postgres' 'english' configuration drops, a tsquery made only of them is empty
+POSTGRES_STOP_WORDS = frozenset(
+    """
+    i me my myself we our ours ourselves you your yours yourself yourselves he him his himself
+    she her hers herself it its itself they them their theirs themselves what which who whom this
+    that these those am is are was were be been being have has had having do does did doing a an
+    the and but if or because as until while of at by for with about against between into through
+    during before after above below to from up down in out on off over under again further then
+    once here there when where why how all any both each few more most other some such no nor not
+    only own same so than too very s t can will just don should now
+    """.split()
+)
+
+POSTGRES_DDL = [
+    """
+    ALTER TABLE recipes ADD COLUMN IF NOT EXISTS search_document tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(ingredients, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_recipes_search_document ON recipes USING GIN (search_document)",
+]
+
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS recipes_fts USING fts5(
+        title, ingredients, description, content='recipes', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS recipes_fts_ai AFTER INSERT ON recipes BEGIN
+        INSERT INTO recipes_fts(rowid, title, ingredients, description)
+        VALUES (new.id, new.title, new.ingredients, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS recipes_fts_ad AFTER DELETE ON recipes BEGIN
+        INSERT INTO recipes_fts(recipes_fts, rowid, title, ingredients, description)
+        VALUES ('delete', old.id, old.title, old.ingredients, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS recipes_fts_au AFTER UPDATE OF title, ingredients, description ON recipes BEGIN
+        INSERT INTO recipes_fts(recipes_fts, rowid, title, ingredients, description)
+        VALUES ('delete', old.id, old.title, old.ingredients, old.description);
+        INSERT INTO recipes_fts(rowid, title, ingredients, description)
+        VALUES (new.id, new.title, new.ingredients, new.description);
+    END
+    """,
+]
+
+# lightweight handles for objects that only exist in the DDL above
+search_document = literal_column("recipes.search_document")
+recipes_fts = table("recipes_fts", column("rowid"))
+
+
+async def create_search_index(connection: AsyncConnection):
+    """
+    Create the search index for the current dialect if it does not exist yet.
+    Called on startup right after the tables are created.
+    """
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        # the generated column is computed for existing rows when it is added
+        for statement in POSTGRES_DDL:
+            await connection.execute(text(statement))
+    elif dialect == "sqlite":
+        result = await connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = 'recipes_fts'")
+        )
+        exists = result.first() is not None
+        for statement in SQLITE_DDL:
+            await connection.execute(text(statement))
+        if not exists:
+            # index the recipes that were there before the index was created
+            await connection.execute(
+                text("INSERT INTO recipes_fts(recipes_fts) VALUES ('rebuild')")
+            )
+
+
+def split_terms(search: str) -> list[str]:
+    """
+    Split a free text search into normalized terms.
+    """
+    return TERM_PATTERN.findall(search.lower())[:MAX_TERMS]
+
+
+def apply_search(query, search: str, dialect: str):
+    """
+    Filter a `select(Recipe)` query down to the recipes matching every term of the search.
+
+    Parameters:
+    - **query**: The select statement to filter.
+    - **search**: The raw search string from the request.
+    - **dialect**: Name of the database dialect the query will run on.
+
+    Returns:
+    - The filtered query and a relevance expression (higher is more relevant) to order by.
+    """
+    terms = split_terms(search)
+    if not terms:
+        # nothing indexable (e.g. only punctuation), keep the old substring behaviour
+        return _apply_fallback(query, [search.lower()])
+    if dialect == "postgresql":
+        if all(term in POSTGRES_STOP_WORDS for term in terms):
+            # an empty tsquery matches nothing, while FTS5 still matches these words
+            return _apply_fallback(query, terms)
+        return _apply_postgres(query, terms)
+    if dialect == "sqlite":
+        return _apply_sqlite(query, terms)
+    return _apply_fallback(query, terms)
+
+
+def _apply_postgres(query, terms: list[str]):
+    # prefix match every term so partial words still find results
+    ts_query = func.to_tsquery("english", " & ".join(f"{term}:*" for term in terms))
+    # default ts_rank weights give A (title) 1.0, B (ingredients) 0.4, C (description) 0.2
+    relevance = func.ts_rank(search_document, ts_query)
+    return query.where(search_document.op("@@")(ts_query)), relevance
+
+
+def _apply_sqlite(query, terms: list[str]):
+    match = " ".join(f'"{term}"*' for term in terms)
+    # bm25 is "lower is better", flip it so every dialect orders by relevance descending
+    relevance = -func.bm25(
+        literal_column("recipes_fts"),
+        TITLE_WEIGHT,
+        INGREDIENTS_WEIGHT,
+        DESCRIPTION_WEIGHT,
+    )
+    query = query.join(recipes_fts, recipes_fts.c.rowid == Recipe.id).where(
+        literal_column("recipes_fts").op("MATCH")(match)
+    )
+    return query, relevance
+
+
+def _apply_fallback(query, terms: list[str]):
+    conditions = []
+    relevance = 0
+    for term in terms:
+        pattern = f"%{term}%"
+        conditions.append(
+            or_(
+                Recipe.title.ilike(pattern),
+                Recipe.ingredients.ilike(pattern),
+                Recipe.description.ilike(pattern),
+            )
+        )
+        relevance = (
+            relevance
+            + case((Recipe.title.ilike(pattern), TITLE_WEIGHT), else_=0.0)
+            + case((Recipe.ingredients.ilike(pattern), INGREDIENTS_WEIGHT), else_=0.0)
+            + case((Recipe.description.ilike(pattern), DESCRIPTION_WEIGHT), else_=0.0)
+        )
+    return query.where(and_(*conditions)), relevance
@@ -0,0 +1,81 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+import hashlib
+
+"""
+Helpers for conditional GET requests (ETag / Last-Modified and 304 Not Modified).
+"""
+
+
+def recipe_etag(
+    id: int, version: int, likes_delta: int = 0, user_id: int | None = None
+) -> str:
+    """
+    ETag of a single recipe. `likes_delta` is the like count still buffered in this worker,
+    `user_id` the authenticated user the representation was made for (it carries `liked_by_me`).
+    """
+    etag = f"r{id}-v{version}-d{likes_delta}"
+    if user_id is not None:
+        etag += f"-u{user_id}"
+    return f'"{etag}"'
+
+
+def list_etag(params, entries) -> str:
+    """
+    ETag of a page of recipes.
+
+    Parameters:
+    - **params**: The normalized query parameters of the page.
+    - **entries**: `(id, version, likes_delta)` of every recipe on the page, in page order.
+    """
+    digest = hashlib.sha1(repr((params, list(entries))).encode()).hexdigest()
+    return f'"l{digest}"'
+
+
+def as_datetime(value):
+    """
+    Return a timezone aware datetime from a datetime or an ISO string (naive values are UTC).
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def http_date(value) -> str:
+    return format_datetime(as_datetime(value).astimezone(timezone.utc), usegmt=True)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # weak comparison, as required for If-None-Match
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in tags
+
+
+def is_not_modified(request_headers, etag: str, last_modified=None) -> bool:
+    """
+    Evaluate If-None-Match, or If-Modified-Since when there is no If-None-Match.
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # http dates have a one second resolution
+        return as_datetime(last_modified).replace(microsecond=0) <= since
+    return False
+
+
+def is_conditional(request_headers) -> bool:
+    return "if-none-match" in request_headers or "if-modified-since" in request_headers
@@ -1,8 +1,69 @@
 from passlib.context import CryptContext
+from concurrent.futures import ThreadPoolExecutor
+from app.config.config import settings
+import asyncio
+import os
 
 
 # set up the password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# pinning min/max rounds to the configured cost makes passlib flag hashes made with any other
+# cost as needing an update, so they get rehashed on the next successful login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds,
+    bcrypt__max_rounds=settings.bcrypt_rounds,
+)
+
+
+class PasswordHasherBusy(Exception):
+    """
+    Raised when the hashing pool already has its maximum number of jobs queued or running.
+    """
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated thread pool so it never blocks the event loop.
+    bcrypt releases the GIL while hashing, so the threads really run in parallel.
+    At most `max_pending` jobs are queued or running, any further job is rejected right away
+    instead of waiting behind a login burst.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hash"
+        )
+
+    async def run(self, function, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusy()
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, function, *args)
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.password_hash_workers or os.cpu_count() or 1,
+    max_pending=settings.password_hash_max_pending,
+)
 
 
 def hash(password: str) -> str:
@@ -24,3 +85,28 @@ def verify_password(plain_password: str, hashed_password) -> bool:
     if they are equal, the user wrote the correct password
     """
     return pwd_context.verify(plain_password, hashed_password)
+
+
+async def hash_async(password: str) -> str:
+    """
+    Hash a password in the hashing pool.
+
+    Raises:
+        PasswordHasherBusy: If the hashing pool is saturated.
+    """
+    return await password_hasher.run(pwd_context.hash, password)
+
+
+async def verify_and_update_async(plain_password: str, hashed_password):
+    """
+    Verify a password in the hashing pool and rehash it when the configured cost changed.
+
+    Returns:
+        tuple: Whether the password is correct, and the new hash to store (or None).
+
+    Raises:
+        PasswordHasherBusy: If the hashing pool is saturated.
+    """
+    return await password_hasher.run(
+        pwd_context.verify_and_update, plain_password, hashed_password
+    )
@@ -0,0 +1,481 @@
+"""
+Repeatable load test of the API.
+
+Boots `app.main:app` in-process behind an ASGI transport, against a throwaway async SQLite
+database by default (or any database given with --database-url), seeds users, recipes and likes,
+then drives one phase per scenario: list, search, detail, like storms, login bursts, uploads and
+a weighted mix of all of them. Every phase reports throughput and p50/p95/p99 latency per endpoint
+as JSON, which can be stored and compared against later runs with --baseline.
+
+The like storm also checks correctness: hundreds of users like the same recipe concurrently and
+the final count has to match the number of likes exactly.
+
+Usage:
+    python -m benchmarks.load [--requests 500] [--concurrency 32] [--output run.json]
+    python -m benchmarks.load --baseline baseline.json --tolerance 0.2
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+import zlib
+
+DEFAULT_DATABASE = os.path.join(tempfile.gettempdir(), "recipes-benchmark.db")
+PASSWORD = "Benchmark1!"
+WORDS = [
+    "oat", "quinoa", "salmon", "avocado", "lentil", "spinach", "chickpea", "kale",
+    "berry", "tofu", "almond", "yogurt", "tomato", "basil", "ginger", "turmeric",
+]
+SCENARIOS = ["list", "search", "detail", "like_storm", "login", "upload", "mixed"]
+MIX = {"list": 40, "search": 15, "detail": 35, "like": 5, "login": 3, "upload": 2}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test the recipes API in-process")
+    parser.add_argument("--database-url", default=f"sqlite+aiosqlite:///{DEFAULT_DATABASE}")
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--recipes", type=int, default=2000)
+    parser.add_argument("--likes", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=500, help="requests per phase")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the report to this file instead of stdout")
+    parser.add_argument("--baseline", help="report of an earlier run to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="allowed relative p95 / throughput regression against the baseline",
+    )
+    return parser.parse_args()
+
+
+def configure_environment(args):
+    # settings are read when the app is imported, so everything is set before that
+    if args.database_url == f"sqlite+aiosqlite:///{DEFAULT_DATABASE}":
+        if os.path.exists(DEFAULT_DATABASE):
+            os.remove(DEFAULT_DATABASE)
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+    os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    # every simulated user logs in from the same in-process client address
+    os.environ.setdefault("LOGIN_RATE_PER_MINUTE", "1000000")
+    os.environ.setdefault("LOGIN_BURST", "1000000")
+    # the phases measure the endpoints, not load shedding: bursts queue instead of getting 503s
+    for budget in ("READ", "WRITE", "AUTH"):
+        os.environ.setdefault(f"ADMISSION_{budget}_QUEUE", "100000")
+    os.environ.setdefault("ADMISSION_QUEUE_TIMEOUT_SECONDS", "600")
+    # uploads of the benchmark must not end up in the real static directory
+    os.environ["UPLOAD_DIR"] = tempfile.mkdtemp(prefix="recipes-benchmark-")
+
+
+def png_image(rng: random.Random, size: int = 64) -> bytes:
+    """
+    A valid single colour PNG, the colour is random so most uploads are unique.
+    """
+    colour = bytes(rng.randrange(256) for _ in range(3))
+    raw = b"".join(b"\x00" + colour * size for _ in range(size))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    header = struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(raw))
+        + chunk(b"IEND", b"")
+    )
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    # nearest rank on an already sorted list
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: dict[str, list[float]] = {}
+        self.statuses: dict[str, dict[str, int]] = {}
+
+    def record(self, endpoint: str, status: int, seconds: float):
+        self.samples.setdefault(endpoint, []).append(seconds)
+        counts = self.statuses.setdefault(endpoint, {})
+        counts[str(status)] = counts.get(str(status), 0) + 1
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {}
+        for endpoint, samples in sorted(self.samples.items()):
+            ordered = sorted(samples)
+            statuses = self.statuses[endpoint]
+            errors = sum(
+                count for status, count in statuses.items() if int(status) >= 500
+            )
+            endpoints[endpoint] = {
+                "requests": len(ordered),
+                "errors": errors,
+                "statuses": statuses,
+                "throughput_rps": round(len(ordered) / elapsed, 2),
+                "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+                "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+                "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+                "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+            }
+        return {"elapsed_s": round(elapsed, 3), "endpoints": endpoints}
+
+
+class Benchmark:
+    def __init__(self, args, app_modules):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.app, self.database, self.models, self.oauth2, self.like_buffer = app_modules
+        self.user_ids: list[int] = []
+        self.recipe_ids: list[int] = []
+        self.owners: dict[int, int] = {}
+        self.tokens: dict[int, str] = {}
+        self.liked: set[tuple[int, int]] = set()
+        self.client = None
+
+    async def seed(self):
+        from sqlalchemy import insert, update, func, select
+        from app.utils import password_hash
+
+        User, Recipe, Like = self.models
+        rng = self.rng
+        args = self.args
+        # every seeded user shares one password, hash it once
+        hashed = password_hash.hash(PASSWORD)
+        async with self.database.engine.begin() as connection:
+            result = await connection.execute(
+                insert(User).returning(User.id),
+                [
+                    {"email": f"user{i}@benchmark.example", "password": hashed}
+                    for i in range(args.users)
+                ],
+            )
+            self.user_ids = list(result.scalars().all())
+            recipes = []
+            for _ in range(args.recipes):
+                words = rng.sample(WORDS, 5)
+                recipes.append(
+                    {
+                        "title": " ".join(words[:3]).title(),
+                        "ingredients": ", ".join(words),
+                        "description": f"Cook the {words[0]} with {words[1]} and serve.",
+                        "owner_id": rng.choice(self.user_ids),
+                    }
+                )
+            result = await connection.execute(
+                insert(Recipe).returning(Recipe.id, Recipe.owner_id), recipes
+            )
+            for recipe_id, owner_id in result.all():
+                self.recipe_ids.append(recipe_id)
+                self.owners[recipe_id] = owner_id
+            likes = []
+            while len(likes) < min(args.likes, args.users * args.recipes // 2):
+                user_id = rng.choice(self.user_ids)
+                recipe_id = rng.choice(self.recipe_ids)
+                if self.owners[recipe_id] == user_id or (user_id, recipe_id) in self.liked:
+                    continue
+                self.liked.add((user_id, recipe_id))
+                likes.append({"user_id": user_id, "recipe_id": recipe_id})
+            if likes:
+                await connection.execute(insert(Like), likes)
+            count = (
+                select(func.count())
+                .where(Like.recipe_id == Recipe.id)
+                .correlate(Recipe)
+                .scalar_subquery()
+            )
+            await connection.execute(update(Recipe).values(likes=count))
+        self.tokens = {
+            id: self.oauth2.create_access_token(data={"user_id": id})
+            for id in self.user_ids
+        }
+
+    def auth(self, user_id: int) -> dict:
+        return {"Authorization": f"Bearer {self.tokens[user_id]}"}
+
+    def hot_recipe(self) -> int:
+        # a skewed popularity, a few recipes take most of the reads
+        index = min(int(self.rng.paretovariate(1.2)) - 1, len(self.recipe_ids) - 1)
+        return self.recipe_ids[index]
+
+    async def request(self, recorder, endpoint: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        recorder.record(endpoint, response.status_code, time.perf_counter() - start)
+        return response
+
+    async def do_list(self, recorder):
+        order_by = self.rng.choice(["created_at", "likes"])
+        params = {"limit": 20, "order_by": order_by, "offset": self.rng.randrange(0, 200)}
+        await self.request(recorder, "GET /recipes/", "GET", "/recipes/", params=params)
+
+    async def do_search(self, recorder):
+        terms = " ".join(self.rng.sample(WORDS, self.rng.randint(1, 2)))
+        params = {"search": terms, "order_by": "relevance", "limit": 20}
+        await self.request(
+            recorder, "GET /recipes/?search", "GET", "/recipes/", params=params
+        )
+
+    async def do_detail(self, recorder):
+        await self.request(
+            recorder, "GET /recipes/{id}", "GET", f"/recipes/{self.hot_recipe()}"
+        )
+
+    async def do_like(self, recorder):
+        user_id = self.rng.choice(self.user_ids)
+        recipe_id = self.rng.choice(self.recipe_ids)
+        if (user_id, recipe_id) in self.liked:
+            method = "DELETE"
+            self.liked.discard((user_id, recipe_id))
+        else:
+            method = "POST"
+            self.liked.add((user_id, recipe_id))
+        await self.request(
+            recorder,
+            f"{method} /recipes/{{id}}/like",
+            method,
+            f"/recipes/{recipe_id}/like",
+            headers=self.auth(user_id),
+        )
+
+    async def do_login(self, recorder):
+        index = self.rng.randrange(len(self.user_ids))
+        await self.request(
+            recorder,
+            "POST /users/login",
+            "POST",
+            "/users/login",
+            data={"username": f"user{index}@benchmark.example", "password": PASSWORD},
+        )
+
+    async def do_upload(self, recorder):
+        user_id = self.rng.choice(self.user_ids)
+        await self.request(
+            recorder,
+            "POST /recipes/",
+            "POST",
+            "/recipes/",
+            headers=self.auth(user_id),
+            data={
+                "title": "Benchmark bowl",
+                "ingredients": "oat, berry, yogurt",
+                "description": "Layer everything in a bowl.",
+            },
+            files={"image": ("bowl.png", png_image(self.rng), "image/png")},
+        )
+
+    async def do_mixed(self, recorder):
+        names = list(MIX)
+        name = self.rng.choices(names, weights=[MIX[name] for name in names])[0]
+        await getattr(self, f"do_{name}")(recorder)
+
+    async def run_phase(self, action) -> dict:
+        recorder = Recorder()
+        remaining = self.args.requests
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                await action(recorder)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(self.args.concurrency)))
+        return recorder.report(time.perf_counter() - start)
+
+    async def run_like_storm(self) -> tuple[dict, dict]:
+        """
+        Every user except the owner likes one fresh recipe at the same time.
+        """
+        from sqlalchemy import insert, select, func
+
+        User, Recipe, Like = self.models
+        owner_id = self.user_ids[0]
+        async with self.database.engine.begin() as connection:
+            result = await connection.execute(
+                insert(Recipe).returning(Recipe.id),
+                [
+                    {
+                        "title": "Viral smoothie",
+                        "ingredients": "berry, yogurt, oat",
+                        "description": "Blend.",
+                        "owner_id": owner_id,
+                    }
+                ],
+            )
+            recipe_id = result.scalar_one()
+        likers = [id for id in self.user_ids if id != owner_id]
+        recorder = Recorder()
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                self.request(
+                    recorder,
+                    "POST /recipes/{id}/like",
+                    "POST",
+                    f"/recipes/{recipe_id}/like",
+                    headers=self.auth(user_id),
+                )
+                for user_id in likers
+            )
+        )
+        report = recorder.report(time.perf_counter() - start)
+
+        response = await self.client.get(f"/recipes/{recipe_id}")
+        api_count = response.json()["likes"]
+        await self.like_buffer.flush()
+        async with self.database.engine.connect() as connection:
+            stored_count = (
+                await connection.execute(
+                    select(Recipe.likes).where(Recipe.id == recipe_id)
+                )
+            ).scalar_one()
+            like_rows = (
+                await connection.execute(
+                    select(func.count()).where(Like.recipe_id == recipe_id)
+                )
+            ).scalar_one()
+        statuses = report["endpoints"]["POST /recipes/{id}/like"]["statuses"]
+        check = {
+            "likers": len(likers),
+            "accepted": statuses.get("202", 0),
+            "api_count": api_count,
+            "stored_count": stored_count,
+            "like_rows": like_rows,
+        }
+        # every like has to be accepted, a rejected one (e.g. shed with a 503) fails the check
+        check["rejected"] = len(likers) - check["accepted"]
+        check["passed"] = (
+            check["rejected"] == 0
+            and api_count == stored_count == like_rows == check["accepted"]
+        )
+        return report, check
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for phase, results in report["phases"].items():
+        for endpoint, current in results["endpoints"].items():
+            previous = baseline.get("phases", {}).get(phase, {}).get("endpoints", {})
+            previous = previous.get(endpoint)
+            if previous is None:
+                continue
+            if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+                regressions.append(
+                    f"{phase} {endpoint}: p95 {previous['p95_ms']}ms"
+                    f" -> {current['p95_ms']}ms"
+                )
+            if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+                regressions.append(
+                    f"{phase} {endpoint}: throughput {previous['throughput_rps']}/s"
+                    f" -> {current['throughput_rps']}/s"
+                )
+    return regressions
+
+
+async def collect(args) -> dict:
+    import httpx
+    from app.main import app
+    from app.database import database
+    from app.database.models.user import User
+    from app.database.models.recipe import Recipe
+    from app.database.models.like import Like
+    from app.database.like_buffer import like_buffer
+    from app.auth import oauth2
+
+    models = (User, Recipe, Like)
+    benchmark = Benchmark(args, (app, database, models, oauth2, like_buffer))
+    # the ASGI transport does not send lifespan events, run the startup handlers by hand
+    await app.router.startup()
+    try:
+        await benchmark.seed()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark"
+        ) as client:
+            benchmark.client = client
+            report = {
+                "meta": {
+                    "database": database.engine.dialect.name,
+                    "users": args.users,
+                    "recipes": args.recipes,
+                    "likes": args.likes,
+                    "requests_per_phase": args.requests,
+                    "concurrency": args.concurrency,
+                    "bcrypt_rounds": args.bcrypt_rounds,
+                    "python": sys.version.split()[0],
+                },
+                "phases": {},
+                "checks": {},
+            }
+            for scenario in args.scenarios.split(","):
+                if scenario == "like_storm":
+                    phase, check = await benchmark.run_like_storm()
+                    report["checks"]["like_storm"] = check
+                else:
+                    action = getattr(benchmark, f"do_{scenario}")
+                    phase = await benchmark.run_phase(action)
+                report["phases"][scenario] = phase
+    finally:
+        await app.router.shutdown()
+        await database.engine.dispose()
+    return report
+
+
+async def run(args) -> int:
+    # the app logs to stdout while it runs, keep stdout for the report alone
+    with contextlib.redirect_stdout(sys.stderr):
+        report = await collect(args)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+    failed = False
+    if not report["checks"].get("like_storm", {"passed": True})["passed"]:
+        print(
+            "like storm check failed: likes were rejected or counts do not match",
+            file=sys.stderr,
+        )
+        failed = True
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(report, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"regression: {regression}", file=sys.stderr)
+        failed = failed or bool(regressions)
+    return 1 if failed else 0
+
+
+def main():
+    args = parse_args()
+    unknown = set(args.scenarios.split(",")) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    configure_environment(args)
+    raise SystemExit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+
+# settings are read when the app is imported, so everything is set before that
+# writers queue on SQLite's file lock, give a burst of them longer than the default 5s
+os.environ["DATABASE_URL"] = (
+    "sqlite+aiosqlite:///"
+    + os.path.join(tempfile.mkdtemp(prefix="recipes-tests-"), "test.db")
+    + "?timeout=60"
+)
+os.environ.setdefault("SECRET_KEY", "tests")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["UPLOAD_DIR"] = tempfile.mkdtemp(prefix="recipes-tests-uploads-")
+os.environ["MAX_UPLOAD_BYTES"] = str(64 * 1024)
+os.environ["MAX_FORM_FIELDS_BYTES"] = str(16 * 1024)
+# the tests fire bursts of concurrent writes, they queue instead of being shed
+os.environ["ADMISSION_WRITE_QUEUE"] = "10000"
+os.environ["ADMISSION_QUEUE_TIMEOUT_SECONDS"] = "60"
+
+import httpx
+import pytest_asyncio
+from sqlalchemy import insert, delete
+from app.main import app
+from app.auth import oauth2
+from app.cache.recipe_cache import recipe_cache
+from app.database import database
+from app.database.models.user import User
+
+
+@pytest_asyncio.fixture(loop_scope="session")
+async def client():
+    # the ASGI transport does not send lifespan events, run the startup handlers by hand
+    await app.router.startup()
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            yield client
+    finally:
+        await app.router.shutdown()
+        # every test starts from empty tables (deleting keeps the search index in sync)
+        async with database.engine.begin() as connection:
+            for table in reversed(database.Base.metadata.sorted_tables):
+                await connection.execute(delete(table))
+        if recipe_cache.backend is not None:
+            await recipe_cache.backend.clear()
+
+
+@pytest_asyncio.fixture(loop_scope="session")
+async def make_users(client):
+    """
+    Insert users directly and return `(id, auth headers)` for each, skipping bcrypt and login.
+    """
+
+    async def make(count: int):
+        async with database.engine.begin() as connection:
+            result = await connection.execute(
+                insert(User).returning(User.id),
+                [
+                    {"email": f"user{i}@tests.example", "password": "unused"}
+                    for i in range(count)
+                ],
+            )
+            ids = list(result.scalars())
+        return [
+            (
+                id,
+                {
+                    "Authorization": "Bearer "
+                    + oauth2.create_access_token(data={"user_id": id})
+                },
+            )
+            for id in ids
+        ]
+
+    return make
@@ -0,0 +1,35 @@
+import httpx
+import pytest
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+from app.main import app, login_limiter
+
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+PROXY = "10.0.0.1"
+
+
+async def test_login_limit_is_per_client_behind_a_trusted_proxy(client):
+    # what the Procfile runs: proxy headers trusted from the proxy addresses only
+    transport = httpx.ASGITransport(
+        app=ProxyHeadersMiddleware(app, trusted_hosts=f"{PROXY}/32"),
+        client=(PROXY, 4321),
+    )
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as proxied:
+
+        async def login(forwarded_for: str) -> int:
+            response = await proxied.post(
+                "/users/login",
+                headers={"X-Forwarded-For": forwarded_for},
+                data={"username": "nobody@tests.example", "password": "wrong"},
+            )
+            return response.status_code
+
+        # the proxy appends the address it saw, a leading entry is whatever the client sent
+        statuses = [
+            await login(f"192.0.2.{attempt}, 203.0.113.7")
+            for attempt in range(login_limiter.burst + 1)
+        ]
+        assert 429 not in statuses[:-1]
+        assert statuses[-1] == 429
+        assert await login("203.0.113.7") == 429
+        assert await login("203.0.113.7, 198.51.100.20") != 429
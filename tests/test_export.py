@@ -0,0 +1,43 @@
+import orjson
+import pytest
+from app.catalog.export import accepts_gzip
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("gzip", True),
+        ("gzip, deflate, br", True),
+        ("br;q=1.0, gzip;q=0.5", True),
+        ("*", True),
+        ("", False),
+        ("identity", False),
+        ("gzip;q=0", False),
+        ("gzip; q=0.0, br", False),
+        ("*;q=1, gzip;q=0", False),
+        ("x-gzip", False),
+    ],
+)
+def test_accepts_gzip_honours_q_values(header, expected):
+    assert accepts_gzip(header) is expected
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_export_is_gzipped_only_when_accepted(client, make_users):
+    [(_, owner)] = await make_users(1)
+    response = await client.post(
+        "/recipes/",
+        headers=owner,
+        data={"title": "Porridge", "ingredients": "oats", "description": "Cook."},
+    )
+    assert response.status_code == 201
+
+    refused = await client.get("/recipes/export", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in refused.headers
+    assert [orjson.loads(line)["title"] for line in refused.content.splitlines()] == [
+        "Porridge"
+    ]
+
+    accepted = await client.get("/recipes/export", headers={"Accept-Encoding": "gzip"})
+    assert accepted.headers["content-encoding"] == "gzip"
+    assert accepted.content == refused.content
@@ -0,0 +1,54 @@
+import orjson
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, select
+from app.catalog.importer import import_file
+from app.database import database
+from app.database.models.recipe import Recipe
+
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+
+@pytest_asyncio.fixture(loop_scope="session")
+async def foreign_keys():
+    # SQLite only enforces foreign keys when asked to, the way Postgres always does
+    def enable(connection, _):
+        connection.execute("PRAGMA foreign_keys=ON")
+
+    event.listen(database.engine.sync_engine, "connect", enable)
+    await database.engine.dispose()
+    yield
+    event.remove(database.engine.sync_engine, "connect", enable)
+    await database.engine.dispose()
+
+
+def write_lines(path, lines):
+    path.write_bytes(
+        b"\n".join(line if isinstance(line, bytes) else orjson.dumps(line) for line in lines)
+    )
+    return str(path)
+
+
+async def test_import_counts_broken_lines_and_rejected_rows(
+    client, make_users, foreign_keys, tmp_path
+):
+    [(owner_id, _)] = await make_users(1)
+    recipe = {"title": "Soup", "ingredients": "leek", "description": "Boil."}
+    path = write_lines(
+        tmp_path / "recipes.ndjson",
+        [
+            {**recipe, "id": 1001, "owner_id": owner_id},
+            b'{"title": "Cut off',
+            {**recipe, "owner_id": owner_id},
+            {**recipe, "id": 1002, "owner_id": owner_id + 1000},
+            {"title": "No owner"},
+            {**recipe, "id": 1003, "owner_id": owner_id},
+        ],
+    )
+
+    report = await import_file("recipes", path, batch_size=10)
+
+    assert report == {"read": 6, "inserted": 3, "invalid": 2, "rejected": 1}
+    async with database.AsyncSessionLocal() as db:
+        owners = set(await db.scalars(select(Recipe.owner_id)))
+    assert owners == {owner_id}
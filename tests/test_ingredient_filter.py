@@ -0,0 +1,25 @@
+import pytest
+
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+
+async def test_filters_without_matchable_ingredients_are_rejected(client, make_users):
+    [(_, owner)] = await make_users(1)
+    for title, ingredients in [("Kale salad", "2 cups kale, lemon"), ("Oats", "oats, milk")]:
+        response = await client.post(
+            "/recipes/",
+            headers=owner,
+            data={"title": title, "ingredients": ingredients, "description": "Mix."},
+        )
+        assert response.status_code == 201
+
+    response = await client.get("/recipes/", params={"with_ingredients": "kale"})
+    assert [recipe["title"] for recipe in response.json()] == ["Kale salad"]
+
+    for name in ["with_ingredients", "any_ingredients", "without_ingredients"]:
+        response = await client.get("/recipes/", params={name: "cups, the"})
+        assert response.status_code == 400
+
+    # an empty parameter is no filter at all
+    response = await client.get("/recipes/", params={"with_ingredients": ""})
+    assert len(response.json()) == 2
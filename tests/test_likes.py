@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+from sqlalchemy import select, func
+from app.database import database
+from app.database.models.like import Like
+from app.database.models.recipe import Recipe
+
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+
+async def stored_likes(recipe_id: int) -> tuple[int, int]:
+    async with database.AsyncSessionLocal() as db:
+        counter = await db.scalar(select(Recipe.likes).where(Recipe.id == recipe_id))
+        rows = await db.scalar(
+            select(func.count()).select_from(Like).where(Like.recipe_id == recipe_id)
+        )
+    return counter, rows
+
+
+async def fire(requests) -> list[int]:
+    responses = await asyncio.gather(*requests)
+    statuses = [response.status_code for response in responses]
+    assert not [code for code in statuses if code >= 500], statuses
+    return statuses
+
+
+async def test_concurrent_likes_and_unlikes_keep_the_counter_exact(
+    client, make_users
+):
+    (_, owner), *likers = await make_users(201)
+    response = await client.post(
+        "/recipes/",
+        headers=owner,
+        data={"title": "Lentil soup", "ingredients": "lentils", "description": "Simmer."},
+    )
+    recipe_id = response.json()["id"]
+    url = f"/recipes/{recipe_id}/like"
+
+    # every user likes, a quarter of them twice at the same time
+    statuses = await fire(
+        [client.post(url, headers=headers) for _, headers in likers]
+        + [client.post(url, headers=headers) for _, headers in likers[::4]]
+    )
+    assert statuses.count(202) == len(likers)
+    assert statuses.count(400) == len(likers[::4])
+    assert await stored_likes(recipe_id) == (len(likers), len(likers))
+
+    # half unlike (some twice) while the other half like again
+    unlikers, others = likers[::2], likers[1::2]
+    statuses = await fire(
+        [client.delete(url, headers=headers) for _, headers in unlikers]
+        + [client.delete(url, headers=headers) for _, headers in unlikers[::5]]
+        + [client.post(url, headers=headers) for _, headers in others]
+    )
+    assert statuses.count(202) == len(unlikers)
+    assert statuses.count(404) == len(unlikers[::5])
+    assert statuses.count(400) == len(others)
+    assert await stored_likes(recipe_id) == (len(others), len(others))
+
+    response = await client.get(f"/recipes/{recipe_id}")
+    assert response.json()["likes"] == len(others)
@@ -0,0 +1,75 @@
+import httpx
+import os
+import pytest
+from app.media import derivatives
+from app.media.static_files import ImmutableStaticFiles
+from app.media.uploads import PUBLIC_PREFIX
+
+
+def test_variant_urls_lists_only_generated_variants(monkeypatch):
+    stem = "a" * 64
+    image_path = f"{PUBLIC_PREFIX}/{stem}.jpg"
+    assert derivatives.variant_urls(image_path) is None
+
+    os.makedirs(derivatives.variants_dir(), exist_ok=True)
+    open(os.path.join(derivatives.variants_dir(), f"{stem}_thumbnail.webp"), "wb").close()
+    # a miss is remembered, the directory is not looked up on every request
+    assert derivatives.variant_urls(image_path) is None
+
+    monkeypatch.setattr(derivatives, "VARIANT_LOOKUP_TTL_SECONDS", 0)
+    assert derivatives.variant_urls(image_path) == {
+        "thumbnail": f"{PUBLIC_PREFIX}/variants/{stem}_thumbnail.webp"
+    }
+    assert derivatives.variant_urls(None) is None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_created_variants_are_listed_right_away():
+    from PIL import Image
+
+    stem = "d" * 64
+    image_path = f"{PUBLIC_PREFIX}/{stem}.png"
+    assert derivatives.variant_urls(image_path) is None
+
+    source = os.path.join(derivatives.settings.upload_dir, f"{stem}.png")
+    Image.new("RGB", (32, 32), "green").save(source)
+    await derivatives.create_variants(image_path)
+    derivatives.shutdown()
+    assert set(derivatives.variant_urls(image_path)) == set(derivatives.VARIANTS)
+
+
+def test_strong_etag_differs_between_an_image_and_its_variants():
+    stat_result = os.stat(__file__)
+    stem = "b" * 64
+    tags = {
+        ImmutableStaticFiles.strong_etag(f"/images/{name}", stat_result, None)
+        for name in [
+            f"{stem}.jpg",
+            f"{stem}_thumbnail.webp",
+            f"{stem}_card.webp",
+            f"{stem}-480.webp",
+        ]
+    }
+    assert len(tags) == 4
+    assert f'"{stem}"' in tags
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_range_requests_resume_with_the_etag_as_if_range(tmp_path):
+    os.makedirs(tmp_path / "images")
+    content = bytes(range(256)) * 4
+    (tmp_path / "images" / f"{'c' * 64}.jpg").write_bytes(content)
+    static = ImmutableStaticFiles(directory=str(tmp_path), immutable_dirs=["images"])
+    transport = httpx.ASGITransport(app=static)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        url = f"/images/{'c' * 64}.jpg"
+        etag = (await client.get(url)).headers["etag"]
+
+        response = await client.get(url, headers={"Range": "bytes=0-9", "If-Range": etag})
+        assert response.status_code == 206
+        assert response.content == content[:10]
+
+        # a different representation sends the whole file again
+        response = await client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"old"'})
+        assert response.status_code == 200
+        assert response.content == content
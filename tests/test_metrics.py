@@ -0,0 +1,32 @@
+import pytest
+
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+
+def samples(text: str) -> dict[str, str]:
+    return dict(line.rsplit(" ", 1) for line in text.splitlines() if not line.startswith("#"))
+
+
+async def test_metrics_label_route_templates_and_expose_counters(client, make_users):
+    [(_, owner)] = await make_users(1)
+    response = await client.post(
+        "/recipes/",
+        headers=owner,
+        data={"title": "Tea", "ingredients": "mint", "description": "Steep."},
+    )
+    recipe_id = response.json()["id"]
+    await client.get(f"/recipes/{recipe_id}")
+    await client.get("/no/such/page")
+    await client.get("/static/images/missing.png")
+
+    text = (await client.get("/metrics")).text
+    series = samples(text)
+    assert 'http_responses_total{method="GET",route="/recipes/{id}",status="200"}' in series
+    assert 'http_responses_total{method="GET",route="<unmatched>",status="404"}' in series
+    assert 'http_responses_total{method="GET",route="/static/{path}",status="404"}' in series
+    assert f'route="/recipes/{recipe_id}"' not in text
+
+    assert "# TYPE app_recipe_cache_hits_total counter" in text
+    assert "# TYPE app_recipe_cache_entries gauge" in text
+    assert "# TYPE app_admission_admitted_total counter" in text
+    assert "app_recipe_cache_hits " not in text
@@ -0,0 +1,46 @@
+import pytest
+from datetime import datetime, timedelta
+from jose import jwt
+from app.auth import oauth2
+
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+
+async def test_public_reads_treat_invalid_tokens_as_anonymous(client, make_users):
+    (owner_id, owner), (liker_id, liker) = await make_users(2)
+    response = await client.post(
+        "/recipes/",
+        headers=owner,
+        data={"title": "Hummus", "ingredients": "chickpeas", "description": "Blend."},
+    )
+    recipe_id = response.json()["id"]
+    assert (await client.post(f"/recipes/{recipe_id}/like", headers=liker)).status_code == 202
+
+    expired = jwt.encode(
+        {"user_id": liker_id, "exp": datetime.utcnow() - timedelta(minutes=5)},
+        oauth2.SECRET_KEY,
+        oauth2.ALGORITHM,
+    )
+    unknown_user = oauth2.create_access_token(data={"user_id": liker_id + owner_id + 1000})
+    for token in ["x.y.z", expired, unknown_user]:
+        headers = {"Authorization": f"Bearer {token}"}
+        for url in [
+            "/recipes/",
+            f"/recipes/{recipe_id}",
+            f"/recipes/batch?ids={recipe_id}",
+            "/recipes/trending",
+        ]:
+            response = await client.get(url, headers=headers)
+            assert response.status_code == 200, (url, response.text)
+            recipes = response.json()
+            for recipe in recipes if isinstance(recipes, list) else [recipes]:
+                assert not recipe.get("liked_by_me")
+
+    # a valid token still gets its own likes
+    response = await client.get(f"/recipes/{recipe_id}", headers=liker)
+    assert response.json()["liked_by_me"] is True
+    # and authenticated endpoints still reject an invalid one
+    response = await client.post(
+        f"/recipes/{recipe_id}/like", headers={"Authorization": "Bearer x.y.z"}
+    )
+    assert response.status_code == 404
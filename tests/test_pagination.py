@@ -0,0 +1,72 @@
+import pytest
+
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+
+async def create_recipes(client, headers, count: int) -> list[int]:
+    ids = []
+    for index in range(count):
+        response = await client.post(
+            "/recipes/",
+            headers=headers,
+            data={
+                "title": f"Green bowl {index}",
+                "ingredients": "kale, oat",
+                "description": "Mix and serve.",
+            },
+        )
+        assert response.status_code == 201
+        ids.append(response.json()["id"])
+    return ids
+
+
+async def walk_cursor_pages(client, order_by: str, limit: int) -> list[list[int]]:
+    pages = []
+    params = {"order_by": order_by, "limit": limit}
+    # more iterations than pages could ever exist, a cursor that does not advance fails the test
+    for _ in range(20):
+        response = await client.get("/recipes/", params=params)
+        assert response.status_code == 200
+        pages.append([recipe["id"] for recipe in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages
+        params = {"order_by": order_by, "limit": limit, "cursor": cursor}
+    pytest.fail(f"cursor pagination by {order_by} never ended: {pages[:4]}")
+
+
+@pytest.mark.parametrize("order_by", ["created_at", "likes"])
+async def test_cursor_pages_cover_every_recipe_once(client, make_users, order_by):
+    (owner_id, owner), *likers = await make_users(4)
+    # created within the same second, so created_at ties and the id decides
+    ids = await create_recipes(client, owner, 7)
+    for (_, headers), liked in zip(likers, [ids[:2], ids[:4], ids[1:2]]):
+        for id in liked:
+            response = await client.post(f"/recipes/{id}/like", headers=headers)
+            assert response.status_code == 202
+
+    response = await client.get("/recipes/", params={"order_by": order_by})
+    expected = [recipe["id"] for recipe in response.json()]
+    assert sorted(expected) == sorted(ids)
+
+    pages = await walk_cursor_pages(client, order_by, limit=3)
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [id for page in pages for id in page] == expected
+
+
+async def test_offset_pages_by_relevance_cover_every_recipe_once(client, make_users):
+    [(_, owner)] = await make_users(1)
+    ids = await create_recipes(client, owner, 7)
+
+    params = {"order_by": "relevance", "search": "bowl"}
+    response = await client.get("/recipes/", params=params)
+    expected = [recipe["id"] for recipe in response.json()]
+    assert sorted(expected) == sorted(ids)
+
+    walked = []
+    for offset in range(0, 9, 3):
+        response = await client.get(
+            "/recipes/", params={**params, "limit": 3, "offset": offset}
+        )
+        walked.extend(recipe["id"] for recipe in response.json())
+    assert walked == expected
@@ -0,0 +1,51 @@
+import os
+import pytest
+import tempfile
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+from app.database import database
+from app.database.replicas import ReplicaSet
+
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+
+def sqlite_engine(path: str):
+    return create_async_engine(f"sqlite+aiosqlite:///{path}")
+
+
+async def test_health_check_takes_unreachable_replicas_out_of_rotation():
+    reachable = sqlite_engine(os.path.join(tempfile.mkdtemp(), "replica.db"))
+    unreachable = sqlite_engine("/nonexistent/directory/replica.db")
+    replicas = ReplicaSet([reachable, unreachable], "round_robin", cooldown=30.0)
+
+    await replicas.check()
+
+    assert {replicas.choose() for _ in range(4)} == {0}
+    assert replicas.stats()["replica1"]["healthy"] == 0
+    await reachable.dispose()
+    await unreachable.dispose()
+
+
+async def test_read_sessions_do_not_connect_up_front(monkeypatch):
+    replica = sqlite_engine(os.path.join(tempfile.mkdtemp(), "replica.db"))
+    monkeypatch.setattr(database, "replica_engines", [replica])
+    monkeypatch.setattr(
+        database,
+        "ReplicaSessions",
+        [sessionmaker(replica, class_=AsyncSession, expire_on_commit=False)],
+    )
+    monkeypatch.setattr(database, "replicas", ReplicaSet([replica], "round_robin", 30.0))
+
+    connects = []
+    event.listen(replica.sync_engine, "connect", lambda *args: connects.append(args))
+
+    sessions = database.get_read_db(Request({"type": "http", "headers": []}))
+    db = await sessions.__anext__()
+    assert db.bind is replica
+    assert connects == []
+    await db.execute(text("SELECT 1"))
+    assert len(connects) == 1
+    await sessions.aclose()
+    await replica.dispose()
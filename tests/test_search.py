@@ -0,0 +1,32 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from app.database.models.recipe import Recipe
+from app.search import recipe_search
+
+
+def postgres_sql(search: str) -> str:
+    query, _ = recipe_search.apply_search(select(Recipe.id), search, "postgresql")
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+def test_postgres_search_of_only_stop_words_falls_back_to_substrings():
+    assert "@@" in postgres_sql("the kale")
+    for search in ["the", "and with"]:
+        sql = postgres_sql(search)
+        assert "@@" not in sql
+        assert "ILIKE" in sql
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_stop_words_still_find_recipes(client, make_users):
+    [(_, owner)] = await make_users(1)
+    response = await client.post(
+        "/recipes/",
+        headers=owner,
+        data={"title": "Rice with the beans", "ingredients": "rice", "description": "Cook."},
+    )
+    assert response.status_code == 201
+
+    response = await client.get("/recipes/", params={"search": "with the"})
+    assert [recipe["title"] for recipe in response.json()] == ["Rice with the beans"]
@@ -0,0 +1,49 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import insert
+from app.database import database
+from app.database.models.like import Like
+from app.ranking.trending import TrendingRanking
+
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+HALF_LIFE = 3600.0
+
+
+async def test_old_likes_weigh_less_than_fresh_ones(client, make_users):
+    (_, owner), *likers = await make_users(4)
+    ids = []
+    for title in ["Old favourite", "New hit"]:
+        response = await client.post(
+            "/recipes/",
+            headers=owner,
+            data={"title": title, "ingredients": "rice", "description": "Cook."},
+        )
+        ids.append(response.json()["id"])
+    old, new = ids
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    async with database.engine.begin() as connection:
+        await connection.execute(
+            insert(Like),
+            [
+                {"user_id": id, "recipe_id": old, "created_at": now - timedelta(hours=5)}
+                for id, _ in likers
+            ]
+            + [
+                {
+                    "user_id": likers[0][0],
+                    "recipe_id": new,
+                    "created_at": now - timedelta(minutes=1),
+                }
+            ],
+        )
+
+    ranking = TrendingRanking(True, HALF_LIFE, 30.0, 3600.0, 100)
+    await ranking.rebuild()
+
+    scores = dict(ranking.page(10, 0))
+    assert list(scores) == [new, old]
+    assert ranking.counted_likes == 4
+    # likes halve every half-life (the recipes themselves are too recent to be counted yet)
+    assert scores[new] == pytest.approx(2 ** (-60 / HALF_LIFE), rel=0.01)
+    assert scores[old] == pytest.approx(3 * 2**-5, rel=0.01)
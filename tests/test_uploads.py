@@ -0,0 +1,57 @@
+import httpx
+import pytest
+from app.config.config import settings
+
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+FIELDS = {"title": "Beet salad", "ingredients": "beets", "description": "Slice."}
+
+
+def png(size: int) -> bytes:
+    return b"\x89PNG\r\n\x1a\n" + b"\0" * (size - 8)
+
+
+def multipart(image: bytes) -> tuple[dict, bytes]:
+    request = httpx.Request(
+        "POST", "http://test/recipes/", data=FIELDS, files={"image": ("a.png", image)}
+    )
+    return {"Content-Type": request.headers["content-type"]}, request.read()
+
+
+async def recipe_count(client) -> int:
+    return len((await client.get("/recipes/")).json())
+
+
+async def test_oversized_upload_is_refused_before_parsing(client, make_users):
+    [(_, owner)] = await make_users(1)
+    limit = settings.max_upload_bytes + settings.max_form_fields_bytes
+    headers, body = multipart(png(limit + 1))
+
+    # announced by Content-Length
+    response = await client.post("/recipes/", headers={**owner, **headers}, content=body)
+    assert response.status_code == 413
+
+    # chunked, without Content-Length
+    async def chunks():
+        for start in range(0, len(body), 8192):
+            yield body[start : start + 8192]
+
+    response = await client.post("/recipes/", headers={**owner, **headers}, content=chunks())
+    assert response.status_code == 413
+    assert await recipe_count(client) == 0
+
+
+async def test_upload_size_is_still_checked_per_file(client, make_users):
+    [(_, owner)] = await make_users(1)
+    # within the request limit thanks to the form allowance, but bigger than an image may be
+    too_big = png(settings.max_upload_bytes + 1)
+    response = await client.post(
+        "/recipes/", headers=owner, data=FIELDS, files={"image": ("a.png", too_big)}
+    )
+    assert response.status_code == 413
+
+    response = await client.post(
+        "/recipes/", headers=owner, data=FIELDS, files={"image": ("a.png", png(1024))}
+    )
+    assert response.status_code == 201
+    assert response.json()["image_path"].endswith(".png")